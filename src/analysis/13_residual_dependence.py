@@ -59,7 +59,8 @@ def main():
     lb_p_at_10 = float(lb['lb_pvalue'].iloc[-1])
 
     # Grid select ARMA(p,q) error model
-    sel = est.estimate_arma_grid(max_p=3, max_q=2, lb_lags=10)
+    # Every row of the published grid is a full MLE fit (no screening)
+    sel = est.estimate_arma_grid(max_p=3, max_q=2, lb_lags=10, screen_method=None)
     est.results['arma_grid'].to_csv(outdir / 'arma_grid.csv', index=False)
 
     best = sel['best']
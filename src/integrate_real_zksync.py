@@ -5,6 +5,11 @@ Replaces any synthetic zkSync data with the real data we extracted from Dune
 """
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import logging
@@ -13,6 +18,16 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def _with_float_ns_dates(tbl):
+    """Return ``tbl`` with its ``date`` column cast to float64 ns since epoch"""
+    date_idx = tbl.schema.get_field_index('date')
+    dates = tbl['date']
+    if dates.type == pa.float64():
+        return tbl
+    if pa.types.is_timestamp(dates.type) or pa.types.is_date(dates.type) or pa.types.is_string(dates.type):
+        dates = pc.cast(pc.cast(dates, pa.timestamp('ns')), pa.int64())
+    return tbl.set_column(date_idx, 'date', pc.cast(dates, pa.float64(), safe=False))
+
 class L2DataIntegrator:
     def __init__(self):
         script_dir = Path(__file__).parent.absolute()
@@ -24,62 +39,91 @@ class L2DataIntegrator:
         """
         logger.info("🔄 Integrating REAL zkSync Era data with existing L2 dataset...")
 
-        # Load existing L2 data (5 real chains)
+        # Locate existing L2 data (5 real chains) and REAL zkSync data
         existing_file = self.data_dir / "l2_daily_metrics.parquet"
         if not existing_file.exists():
             logger.error("❌ No existing L2 data found")
             return None
 
-        existing_df = pd.read_parquet(existing_file)
-        logger.info(f"✅ Loaded existing data: {len(existing_df)} records")
-        logger.info(f"Existing chains: {sorted(existing_df['chain'].unique())}")
-
-        # Load REAL zkSync data
         zksync_file = self.data_dir / "zksync_real_data.parquet"
         if not zksync_file.exists():
             logger.error("❌ No REAL zkSync data found - run extract_zksync_only.py first")
             return None
 
-        zksync_df = pd.read_parquet(zksync_file)
-        logger.info(f"✅ Loaded REAL zkSync data: {len(zksync_df)} records")
-
-        # Validate zkSync data
-        dates = pd.to_datetime(zksync_df['date'], unit='ns')
-        logger.info(f"zkSync date range: {dates.min().date()} to {dates.max().date()}")
-        logger.info(f"zkSync transaction range: {zksync_df['tx_count'].min():,.0f} to {zksync_df['tx_count'].max():,.0f}")
+        # The two reads are independent and pyarrow releases the GIL while
+        # decoding, so load them concurrently. Any existing zkSync rows (in
+        # case there was synthetic data) are dropped by the reader itself;
+        # rows with a null chain are kept, as the old pandas filter did.
+        # The zkSync file is read whole: its full date and transaction range
+        # is validated below before the Era cut
+        chain = pc.field('chain')
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            existing_future = executor.submit(pq.read_table, existing_file,
+                                              filters=chain.is_null() | (chain != 'zksync'))
+            zksync_future = executor.submit(pq.read_table, zksync_file)
+            existing_real_tbl = existing_future.result()
+            zksync_tbl = zksync_future.result()
+
+        logger.info(f"✅ Loaded existing data without zkSync: {existing_real_tbl.num_rows} records")
+        logger.info(f"Existing chains: {sorted(pc.unique(pc.drop_null(existing_real_tbl['chain'])).to_pylist())}")
+
+        logger.info(f"✅ Loaded REAL zkSync data: {zksync_tbl.num_rows} records")
+        if zksync_tbl.num_rows == 0:
+            logger.warning("⚠️ REAL zkSync data file is empty - nothing to integrate")
+            return None
 
-        # Filter zkSync data to only include Era period (from March 24, 2023)
+        # Validate zkSync data (min and max fused into one Arrow pass per column)
+        date_range = pc.min_max(zksync_tbl['date'])
+        tx_range = pc.min_max(zksync_tbl['tx_count'])
+        date_min = pd.to_datetime(date_range['min'].as_py(), unit='ns')
+        date_max = pd.to_datetime(date_range['max'].as_py(), unit='ns')
+        logger.info(f"zkSync date range: {date_min.date()} to {date_max.date()}")
+        logger.info(f"zkSync transaction range: {tx_range['min'].as_py():,.0f} to {tx_range['max'].as_py():,.0f}")
+
+        # Filter zkSync data to only include Era period (from March 24, 2023).
+        # Filter and cast on the Arrow table in one pass each, so only the Era
+        # rows are ever materialized in pandas
         era_start = datetime(2023, 3, 24).timestamp() * 1_000_000_000
-        zksync_era_df = zksync_df[zksync_df['date'] >= era_start].copy()
+        zksync_era_tbl = zksync_tbl.filter(pc.greater_equal(zksync_tbl['date'], era_start))
+        if zksync_era_tbl.num_rows == 0:
+            logger.warning("⚠️ No zkSync records in the Era period - nothing to integrate")
+            return None
+        zksync_era_df = _with_float_ns_dates(zksync_era_tbl).to_pandas()
         logger.info(f"Filtered to zkSync Era period: {len(zksync_era_df)} records")
 
-        # Remove any existing zkSync data from existing dataset (in case there was synthetic data)
-        existing_real_chains = existing_df[existing_df['chain'] != 'zksync'].copy()
-        logger.info(f"Existing data without zkSync: {len(existing_real_chains)} records")
-
-        # Ensure consistent data types
-        if not existing_real_chains.empty:
-            if existing_real_chains['date'].dtype != 'float64':
-                existing_real_chains['date'] = pd.to_datetime(existing_real_chains['date']).astype('int64').astype('float64')
+        if existing_real_tbl.num_rows == 0:
+            logger.warning("⚠️ Existing dataset has no non-zkSync chains - nothing to integrate")
+            return None
 
-        zksync_era_df['date'] = zksync_era_df['date'].astype('float64')
+        # Ensure consistent data types (single Arrow cast instead of a pandas
+        # datetime -> int64 -> float64 chain)
+        existing_real_chains = _with_float_ns_dates(existing_real_tbl).to_pandas()
 
         # Combine all REAL data
         combined_df = pd.concat([existing_real_chains, zksync_era_df], ignore_index=True)
 
-        # Sort by date
-        combined_df['date_for_sort'] = pd.to_datetime(combined_df['date'], unit='ns')
-        combined_df = combined_df.sort_values(['date_for_sort', 'chain'])
-        combined_df = combined_df.drop('date_for_sort', axis=1)
+        # Sort by date (ns epoch floats order the same as their datetimes)
+        combined_df = combined_df.sort_values(['date', 'chain'])
 
         logger.info(f"✅ Combined dataset: {len(combined_df)} records")
-        logger.info(f"All chains: {sorted(combined_df['chain'].unique())}")
+        logger.info(f"All chains: {sorted(combined_df['chain'].dropna().unique())}")
 
         # Save integrated REAL data
         output_file = self.data_dir / "l2_daily_metrics_with_real_zksync.parquet"
-        combined_df.to_parquet(output_file, index=False)
+        # Stream record batches through a ParquetWriter so writer memory is
+        # bounded by one row group rather than the whole dataset
+        combined_tbl = pa.Table.from_pandas(combined_df, preserve_index=False)
+        with pq.ParquetWriter(output_file, combined_tbl.schema, compression='zstd', use_dictionary=True) as writer:
+            for batch in combined_tbl.to_batches(max_chunksize=256_000):
+                writer.write_batch(batch)
+
+        # Arrow IPC copy for in-process consumers: no decode step and can be
+        # memory-mapped with feather.read_table(..., memory_map=True)
+        feather_file = output_file.with_suffix('.arrow')
+        feather.write_feather(combined_tbl, feather_file, compression='lz4')
 
         logger.info(f"💾 Saved integrated REAL data: {output_file}")
+        logger.info(f"💾 Saved Arrow IPC cache: {feather_file}")
 
         # Create summary
         summary = combined_df.groupby('chain').agg({
@@ -92,7 +136,7 @@ class L2DataIntegrator:
 
         # Show data quality assessment
         logger.info("\n🔍 Data Quality Assessment:")
-        for chain in sorted(combined_df['chain'].unique()):
+        for chain in sorted(combined_df['chain'].dropna().unique()):
             chain_data = combined_df[combined_df['chain'] == chain]
             if len(chain_data) > 0:
                 start_date = pd.to_datetime(chain_data['date'].min(), unit='ns').date()
@@ -1,15 +1,67 @@
-"""Minimal off-chain API clients (placeholders)."""
+"""Minimal off-chain API clients.
+
+Both clients hold a single ``requests.Session`` so repeated calls reuse the
+pooled keep-alive connection instead of paying a TCP + TLS handshake per
+query.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import io
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import requests
+
+DUNE_API_URL = "https://api.dune.com/api/v1"
+COINGECKO_API_URL = "https://api.coingecko.com/api/v3"
 
 
 class DuneClient:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, timeout: float = 60.0, max_workers: int = 6):
         self.api_key = api_key
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._session = requests.Session()
+        self._session.headers.update({"X-Dune-API-Key": api_key})
 
-    def fetch(self, query_id: str, params: dict | None = None):
-        raise NotImplementedError
+    def fetch(self, query_id: str, params: dict | None = None) -> pa.Table:
+        """Fetch the latest results of a saved query as an Arrow table."""
+        response = self._session.get(
+            f"{DUNE_API_URL}/query/{query_id}/results/csv",
+            params=params,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        # pyarrow's CSV reader is multi-threaded and yields typed columns
+        return pa_csv.read_csv(io.BytesIO(response.content))
+
+    def fetch_many(self, query_ids: list[str], params: dict | None = None) -> list[pa.Table]:
+        """Fetch several queries concurrently over the shared session."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda q: self.fetch(q, params), query_ids))
+
+    def close(self) -> None:
+        self._session.close()
 
 
 class CoinGeckoClient:
-    def fetch_price_series(self, asset: str = "ethereum"):
-        raise NotImplementedError
+    def __init__(self, timeout: float = 60.0):
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def fetch_price_series(self, asset: str = "ethereum", vs_currency: str = "usd", days: str = "max") -> pa.Table:
+        """Fetch the daily price series for ``asset`` as an Arrow table."""
+        response = self._session.get(
+            f"{COINGECKO_API_URL}/coins/{asset}/market_chart",
+            params={"vs_currency": vs_currency, "days": days, "interval": "daily"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        prices = response.json().get("prices", [])
+        return pa.table({
+            "timestamp_ms": pa.array([p[0] for p in prices], type=pa.int64()),
+            "price": pa.array([p[1] for p in prices], type=pa.float64()),
+        })
 
+    def close(self) -> None:
+        self._session.close()
@@ -21,14 +21,17 @@ Date: 2025-10-18
 
 import pandas as pd
 import numpy as np
+import scipy.linalg
+from scipy import stats
 import statsmodels.api as sm
-from statsmodels.regression.linear_model import OLS, WLS
-from statsmodels.stats.sandwich_covariance import cov_hac
+from statsmodels.regression.linear_model import OLS, WLS, RegressionResultsWrapper
 from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.stats.diagnostic import acorr_ljungbox, het_white
+from statsmodels.tsa.stattools import acf
 from statsmodels.stats.stattools import durbin_watson
-from patsy import dmatrices
 from typing import Dict, Tuple, Optional, Any
+from functools import lru_cache
+from joblib import Parallel, delayed
+from threadpoolctl import threadpool_limits
 import warnings
 from datetime import datetime
 import yaml
@@ -36,8 +39,221 @@ from pathlib import Path
 
 from project_A_effects.visualization.utils.provenance import ProvenanceFooter
 
-# Suppress convergence warnings for ARIMA
-warnings.filterwarnings('ignore', category=UserWarning)
+# libyaml's C emitter when available
+_YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+# Arrays above this size go to a companion .npz instead of the YAML
+_YAML_ARRAY_LIMIT = 1000
+
+
+@lru_cache(maxsize=None)
+def _andrews_bandwidth(n: int) -> int:
+    """Andrews (1991) automatic HAC bandwidth for a sample of size n."""
+    return int(4 * (n/100)**(2/9))
+
+
+def _hac_sandwich(X: np.ndarray, resid: np.ndarray, maxlags: int,
+                  gram_inv: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Bartlett-kernel HAC covariance with small-sample correction.
+
+    Matches statsmodels' ``cov_type='HAC'`` with ``use_correction=True``:
+    (X'X)^-1 S (X'X)^-1 * n/(n-k), where S sums the weighted lagged
+    cross-products of the scores u_t * x_t (one GEMM per lag).
+
+    Args:
+        X: Design matrix (n x k)
+        resid: OLS residuals (n,)
+        maxlags: Bartlett bandwidth
+        gram_inv: Precomputed (X'X)^-1, if available
+
+    Returns:
+        Parameter covariance matrix (k x k)
+    """
+    n, k = X.shape
+    scores = resid[:, None] * X
+    meat = scores.T @ scores
+    for lag in range(1, maxlags + 1):
+        gamma = scores[lag:].T @ scores[:-lag]
+        meat += (1 - lag / (maxlags + 1)) * (gamma + gamma.T)
+    if gram_inv is None:
+        gram_inv = np.linalg.pinv(X.T @ X)
+    return gram_inv @ meat @ gram_inv * (n / (n - k))
+
+
+def _ols_beta_cholesky(X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    OLS via Cholesky-factored normal equations.
+
+    For the small-k designs used here this is much cheaper than a full
+    statsmodels fit. Falls back to least squares if X'X is not positive
+    definite (e.g. an all-zero regime column).
+
+    Returns:
+        Tuple of (params, residuals, (X'X)^-1)
+    """
+    gram = X.T @ X
+    try:
+        factor = scipy.linalg.cho_factor(gram, lower=True)
+        params = scipy.linalg.cho_solve(factor, X.T @ y)
+        gram_inv = scipy.linalg.cho_solve(factor, np.eye(gram.shape[0]))
+    except np.linalg.LinAlgError:
+        params = np.linalg.lstsq(X, y, rcond=None)[0]
+        gram_inv = np.linalg.pinv(gram)
+    return params, y - X @ params, gram_inv
+
+
+def _ljung_box(resid: np.ndarray, lags: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ljung-Box statistics and p-values for lags 1..``lags`` from a single FFT
+    autocorrelation pass.
+
+    Same statistic as ``acorr_ljungbox`` without building a DataFrame per call.
+    """
+    n = len(resid)
+    r = acf(resid, nlags=lags, fft=True)[1:]
+    k = np.arange(1, lags + 1)
+    q_stat = n * (n + 2) * np.cumsum(r * r / (n - k))
+    return q_stat, stats.chi2.sf(q_stat, df=k)
+
+
+def _white_test(resid: np.ndarray, exog: np.ndarray) -> Tuple[float, float]:
+    """
+    White's heteroskedasticity LM test (statistic, p-value).
+
+    Same LM statistic and degrees of freedom as ``het_white``, but exact
+    duplicate columns of the auxiliary design (e.g. squared 0/1 dummies) are
+    dropped before the R^2 regression. Duplicates change neither the fit nor
+    its rank.
+    """
+    n, k = exog.shape
+    i0, i1 = np.triu_indices(k)
+    aux = np.unique(exog[:, i0] * exog[:, i1], axis=1)
+    e2 = resid * resid
+    coef, _, rank, _ = np.linalg.lstsq(aux, e2, rcond=None)
+    ssr = np.sum((e2 - aux @ coef) ** 2)
+    centered_tss = np.sum((e2 - e2.mean()) ** 2)
+    lm = n * (1 - ssr / centered_tss)
+    return float(lm), float(stats.chi2.sf(lm, rank - 1))
+
+
+def _yaml_safe(value: Any, output_dir: Path, key: str = '') -> Any:
+    """
+    Convert numpy values in a results tree for the safe YAML dumper.
+
+    Scalars become Python numbers and small arrays lists. Arrays larger than
+    ``_YAML_ARRAY_LIMIT`` are saved to ``<key>.npz`` in ``output_dir`` and
+    replaced by ``{'_ref': '<key>.npz'}``.
+    """
+    if isinstance(value, dict):
+        safe = {}
+        for k, v in value.items():
+            k = k.item() if isinstance(k, np.generic) else k
+            safe[k] = _yaml_safe(v, output_dir, f"{key}.{k}" if key else str(k))
+        return safe
+    if isinstance(value, (list, tuple)):
+        return [_yaml_safe(v, output_dir, f"{key}_{i}") for i, v in enumerate(value)]
+    if isinstance(value, np.ndarray):
+        if value.size > _YAML_ARRAY_LIMIT:
+            ref = f"{key}.npz"
+            np.savez_compressed(output_dir / ref, values=value)
+            return {'_ref': ref}
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _fit_one_arma(p: int, q: int, y_vec: np.ndarray, X_vals: np.ndarray, lb_lags: int,
+                  start_params: Optional[np.ndarray] = None,
+                  method: str = 'statespace') -> Tuple[Dict, Optional[np.ndarray]]:
+    """
+    Fit a single ARMA(p,q)-errors model for the ARMA grid search.
+
+    Args:
+        start_params: Optional starting values (statsmodels defaults if None;
+            only used by the 'statespace' MLE)
+        method: ``ARIMA.fit`` estimation method; falls back to the
+            'statespace' MLE if it fails
+
+    Returns:
+        Tuple of (grid row dictionary, fitted params). The row is NaN/inf and
+        the params None if the fit fails. The row's 'estimation' entry names
+        the method that produced it.
+    """
+    estimation = method
+    try:
+        arima_model = ARIMA(endog=y_vec, exog=X_vals, order=(p, 0, q), trend='c')
+        # Suppress convergence warnings for ARIMA
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=UserWarning)
+            res = None
+            if method != 'statespace':
+                try:
+                    res = arima_model.fit(method=method)
+                except Exception:
+                    # e.g. non-stationary screening estimates: fall back to MLE
+                    estimation = 'statespace'
+            if res is None:
+                res = arima_model.fit(start_params=start_params)
+        # Treatment coefficient is first column in X_exog
+        beta = float(res.params[1])
+        se = float(res.bse[1])
+        aic = float(res.aic)
+        bic = float(res.bic)
+        resid = np.asarray(res.resid)
+        dw = float(durbin_watson(resid))
+        _, lb_pvalues = _ljung_box(resid, lb_lags)
+        lb_p_at_max = float(lb_pvalues[-1])
+        lb_p_min = float(lb_pvalues.min())
+        return {
+            'p': p, 'q': q,
+            'beta': beta, 'se': se,
+            'aic': aic, 'bic': bic, 'dw': dw,
+            'lb_p_at_maxlag': lb_p_at_max,
+            'lb_p_min': lb_p_min,
+            'n': int(res.nobs),
+            'estimation': estimation
+        }, np.asarray(res.params)
+    except Exception:
+        return {
+            'p': p, 'q': q, 'beta': np.nan, 'se': np.nan,
+            'aic': np.inf, 'bic': np.inf, 'dw': np.nan,
+            'lb_p_at_maxlag': np.nan, 'lb_p_min': np.nan,
+            'n': int(len(y_vec)), 'estimation': estimation
+        }, None
+
+
+def _fit_arma_row(p: int, max_q: int, y_vec: np.ndarray, X_vals: np.ndarray, lb_lags: int,
+                  warm_start: bool = False, method: str = 'statespace') -> list:
+    """
+    Fit ARMA(p,0..max_q)-errors models for one AR order of the grid.
+
+    Kept at module level so joblib workers can pickle it. BLAS is pinned to one
+    thread per worker to avoid oversubscription across parallel fits. With
+    ``warm_start`` each (p,q) fit starts from the (p,q-1) estimates with a zero
+    for the new MA coefficient, since the exogenous coefficients barely move
+    across q. Warm starts only apply to the 'statespace' MLE ``method`` and
+    can land on a different local optimum than the default starting values,
+    which changes the selected order, so they are off by default.
+
+    Returns:
+        Grid rows for q = 0..max_q, skipping the trivial (0,0) case
+    """
+    k_exog = X_vals.shape[1]
+    rows = []
+    last_params = None
+    with threadpool_limits(limits=1, user_api='blas'):
+        for q in range(max_q + 1):
+            # skip the trivial (0,0) case since OLS already reported
+            if p == 0 and q == 0:
+                continue
+            start_params = None
+            if warm_start and last_params is not None:
+                # params are [const, exog..., ar..., ma..., sigma2]
+                start_params = np.insert(last_params, 1 + k_exog + p + q - 1, 0.0)
+            row, last_params = _fit_one_arma(p, q, y_vec, X_vals, lb_lags, start_params, method)
+            rows.append(row)
+    return rows
 
 
 class ITSLevelsEstimator:
@@ -46,9 +262,15 @@ class ITSLevelsEstimator:
     Properly aligns estimand with interpretation and BSTS calibration.
     """
 
+    # Controls shared by every levels specification
+    _BASE_CONTROLS = ['D_star', 'regime_merge', 'regime_dencun',
+                      'is_weekend', 'is_month_end']
+
     def __init__(self, data: pd.DataFrame,
                  outcome: str = 'log_base_fee',
-                 treatment: str = 'A_t_clean'):
+                 treatment: str = 'A_t_clean',
+                 assume_sorted: bool = False,
+                 assume_filtered: bool = False):
         """
         Initialize ITS levels estimator.
 
@@ -56,10 +278,16 @@ class ITSLevelsEstimator:
             data: Panel data with treatment and outcomes
             outcome: Outcome variable name (log scale for semi-elasticity)
             treatment: Treatment variable name
+            assume_sorted: Skip sorting (data already sorted by date)
+            assume_filtered: Skip the post-London filter (data already filtered)
         """
-        self.data = data.copy()
+        # The caller's frame is never modified: filtering/sorting copy, and
+        # otherwise a shallow copy is enough since only new columns are added
+        self.data = data
         self.outcome = outcome
         self.treatment = treatment
+        self.assume_sorted = assume_sorted
+        self.assume_filtered = assume_filtered
         self.results = {}
         self.diagnostics = {}
 
@@ -73,13 +301,29 @@ class ITSLevelsEstimator:
 
     def _prepare_data(self):
         """Prepare data for levels specification."""
+        data = self.data
+
         # Filter to post-London
-        self.data = self.data[self.data['date'] >= self.LONDON_DATE].copy()
-        self.data = self.data.sort_values('date').reset_index(drop=True)
+        if not self.assume_filtered:
+            post_london = (data['date'] >= self.LONDON_DATE).to_numpy()
+            if not post_london.all():
+                data = data[post_london]
+
+        if not (self.assume_sorted or data['date'].is_monotonic_increasing):
+            data = data.sort_values('date')
+
+        if data.index.equals(pd.RangeIndex(len(data))):
+            data = data.copy(deep=False)
+        else:
+            data = data.reset_index(drop=True)
+        self.data = data
 
         # Create log outcomes if not present
         if 'log_base_fee' not in self.data.columns and 'base_fee_median_gwei' in self.data.columns:
-            self.data['log_base_fee'] = np.log(self.data['base_fee_median_gwei'] + 1)
+            self.data['log_base_fee'] = np.log1p(self.data['base_fee_median_gwei'].to_numpy())
+
+        # Raw datetime64 values so indicators are plain NumPy comparisons
+        dates = self.data['date'].to_numpy(dtype='datetime64[ns]')
 
         # Create regime indicators (check if they exist first)
         if 'regime_post_merge' in self.data.columns:
@@ -88,33 +332,46 @@ class ITSLevelsEstimator:
             self.data['regime_dencun'] = self.data.get('regime_post_dencun', 0)
         else:
             # Create regime indicators
-            self.data['regime_london'] = (
-                (self.data['date'] >= self.LONDON_DATE) &
-                (self.data['date'] < self.MERGE_DATE)
-            ).astype(int)
+            london = self.LONDON_DATE.to_datetime64()
+            merge = self.MERGE_DATE.to_datetime64()
+            dencun = self.DENCUN_DATE.to_datetime64()
 
-            self.data['regime_merge'] = (
-                (self.data['date'] >= self.MERGE_DATE) &
-                (self.data['date'] < self.DENCUN_DATE)
-            ).astype(int)
-
-            self.data['regime_dencun'] = (
-                self.data['date'] >= self.DENCUN_DATE
-            ).astype(int)
+            self.data['regime_london'] = ((dates >= london) & (dates < merge)).astype(np.int8)
+            self.data['regime_merge'] = ((dates >= merge) & (dates < dencun)).astype(np.int8)
+            self.data['regime_dencun'] = (dates >= dencun).astype(np.int8)
 
         # Calendar effects - only create if missing
+        calendar = pd.DatetimeIndex(dates)
+        # 0/1 indicators and small calendar codes are stored as int8
+        day_of_week = calendar.dayofweek.values.astype(np.int8)
         if 'day_of_week' not in self.data.columns:
-            self.data['day_of_week'] = self.data['date'].dt.dayofweek
+            self.data['day_of_week'] = day_of_week
         if 'month_of_year' not in self.data.columns:
-            self.data['month_of_year'] = self.data['date'].dt.month
+            self.data['month_of_year'] = calendar.month.values.astype(np.int8)
         if 'is_weekend' not in self.data.columns:
-            self.data['is_weekend'] = (self.data['date'].dt.dayofweek >= 5).astype(int)
+            self.data['is_weekend'] = (day_of_week >= 5).astype(np.int8)
         if 'is_month_end' not in self.data.columns:
-            self.data['is_month_end'] = self.data['date'].dt.is_month_end.astype(int)
+            self.data['is_month_end'] = calendar.is_month_end.astype(np.int8)
 
         # Time trend
         self.data['time_trend'] = np.arange(len(self.data))
 
+        # Build the shared design matrix once; each specification slices the
+        # columns it needs instead of re-parsing a patsy formula
+        self._main_cols = ['Intercept', self.treatment] + self._BASE_CONTROLS
+        self._base_cols = self._main_cols + ['time_trend']
+        self._base_index = {col: i for i, col in enumerate(self._base_cols)}
+        self._base_exog = np.column_stack(
+            [np.ones(len(self.data))] +
+            [self.data[col].to_numpy(dtype=np.float64) for col in self._base_cols[1:]]
+        )
+        self._base_y = self.data[self.outcome].to_numpy(dtype=np.float64)
+
+        # Rows complete over every panel column. The lag and difference
+        # helpers are folded in as specifications create them, so those
+        # specifications keep the complete-case sample of self.data.dropna()
+        self._complete_rows = self.data.notna().all(axis=1).to_numpy()
+
         print(f"Data prepared: {len(self.data)} observations from {self.data['date'].min():%Y-%m-%d} to {self.data['date'].max():%Y-%m-%d}")
 
     def estimate_main_spec(self, use_time_trend: bool = False) -> Dict:
@@ -127,25 +384,16 @@ class ITSLevelsEstimator:
         Returns:
             Dictionary with estimation results
         """
-        print("\n" + "="*60)
-        print("MAIN LEVELS SPECIFICATION")
-        print("="*60)
+        lines = ["\n" + "="*60, "MAIN LEVELS SPECIFICATION", "="*60]
 
-        # Define formula - simpler to avoid multicollinearity
-        formula_parts = [
-            f"{self.outcome} ~ {self.treatment}",
-            "D_star",
-            "regime_merge + regime_dencun",
-            "is_weekend + is_month_end"
-        ]
+        # Define regressors - simpler to avoid multicollinearity
+        columns = list(self._main_cols)
 
         if use_time_trend:
-            formula_parts.append("time_trend")
-
-        formula = " + ".join(formula_parts)
+            columns.append('time_trend')
 
         # Create design matrices
-        y, X = dmatrices(formula, data=self.data, return_type='dataframe')
+        y, X = self._design(columns)
 
         # Estimate OLS
         model = OLS(y, X)
@@ -154,16 +402,10 @@ class ITSLevelsEstimator:
         # HAC standard errors with automatic bandwidth selection
         # Andrews (1991) automatic bandwidth selection
         n = len(y)
-        bandwidth = int(4 * (n/100)**(2/9))  # Andrews formula
-
-        hac_results = model.fit(
-            cov_type='HAC',
-            cov_kwds={
-                'kernel': 'bartlett',
-                'use_correction': True,
-                'maxlags': bandwidth
-            }
-        )
+        bandwidth = _andrews_bandwidth(n)
+
+        # Reuse the OLS fit; only the sandwich covariance is recomputed
+        hac_results = self._hac_results(ols_results, bandwidth)
 
         # Extract treatment effect
         beta = hac_results.params[self.treatment]
@@ -172,7 +414,7 @@ class ITSLevelsEstimator:
         pval = hac_results.pvalues[self.treatment]
 
         # Calculate semi-elasticity
-        semi_elasticity = (np.exp(0.10 * beta) - 1) * 100
+        semi_elasticity = self._semi_elasticity(beta)
         semi_se = self._delta_method_se(beta, se)
 
         # Store results
@@ -193,20 +435,84 @@ class ITSLevelsEstimator:
         }
 
         # Diagnostics
-        self._run_diagnostics(ols_results)
-
-        print(f"\nRESULTS:")
-        print(f"  β (A_t coefficient): {beta:.4f}")
-        print(f"  SE (HAC, bw={bandwidth}): {se:.4f}")
-        print(f"  95% CI: [{ci_lower:.4f}, {ci_upper:.4f}]")
-        print(f"  P-value: {pval:.4f}")
-        print(f"  Semi-elasticity (10pp): {semi_elasticity:.2f}% ± {semi_se:.2f}%")
-        print(f"  Interpretation: 10pp increase in A_t → {semi_elasticity:.2f}% change in base fee")
-        print(f"  R²: {ols_results.rsquared:.4f}")
-        print(f"  N: {len(y)}")
+        lines.extend(self._run_diagnostics(ols_results))
+
+        lines.append(f"\nRESULTS:")
+        lines.append(f"  β (A_t coefficient): {beta:.4f}")
+        lines.append(f"  SE (HAC, bw={bandwidth}): {se:.4f}")
+        lines.append(f"  95% CI: [{ci_lower:.4f}, {ci_upper:.4f}]")
+        lines.append(f"  P-value: {pval:.4f}")
+        lines.append(f"  Semi-elasticity (10pp): {semi_elasticity:.2f}% ± {semi_se:.2f}%")
+        lines.append(f"  Interpretation: 10pp increase in A_t → {semi_elasticity:.2f}% change in base fee")
+        lines.append(f"  R²: {ols_results.rsquared:.4f}")
+        lines.append(f"  N: {len(y)}")
+
+        print('\n'.join(lines))
 
         return self.results['main_effect']
 
+    def estimate_main_spec_batch(self, outcomes: list, use_time_trend: bool = False) -> pd.DataFrame:
+        """
+        Estimate the main levels specification for several outcomes at once.
+
+        All outcomes share the main-spec design, so one QR factorization of X
+        solves every column of Y. Standard errors are Bartlett HAC as in
+        estimate_main_spec, computed per outcome from the shared factorization.
+        Rows missing any outcome are dropped for all outcomes.
+
+        Args:
+            outcomes: Outcome column names (log scale for semi-elasticity)
+            use_time_trend: Whether to include linear time trend
+
+        Returns:
+            DataFrame with one row per outcome
+        """
+        lines = ["\n" + "="*60, f"MAIN LEVELS SPECIFICATION - BATCH ({len(outcomes)} outcomes)", "="*60]
+
+        columns = list(self._main_cols)
+        if use_time_trend:
+            columns.append('time_trend')
+
+        X = self._base_exog[:, [self._base_index[col] for col in columns]]
+        Y = np.column_stack([self.data[col].to_numpy(dtype=np.float64) for col in outcomes])
+        keep = ~(np.isnan(Y).any(axis=1) | np.isnan(X).any(axis=1))
+        X, Y = X[keep], Y[keep]
+        n, k = X.shape
+
+        # One factorization for all outcomes
+        Q, R = np.linalg.qr(X)
+        B = scipy.linalg.solve_triangular(R, Q.T @ Y)
+        resid = Y - X @ B
+        R_inv = scipy.linalg.solve_triangular(R, np.eye(k))
+        gram_inv = R_inv @ R_inv.T
+
+        bandwidth = _andrews_bandwidth(n)
+        treat_idx = columns.index(self.treatment)
+
+        betas = B[treat_idx]
+        ses = np.empty(len(outcomes))
+        for j in range(len(outcomes)):
+            cov = _hac_sandwich(X, resid[:, j], bandwidth, gram_inv)
+            ses[j] = np.sqrt(cov[treat_idx, treat_idx])
+
+        batch = pd.DataFrame({
+            'outcome': outcomes,
+            'beta': betas,
+            'se': ses,
+            'semi_elasticity': self._semi_elasticity(betas),
+            'semi_se': self._delta_method_se(betas, ses),
+            'bandwidth': bandwidth,
+            'n_obs': n
+        })
+
+        self.results['main_batch'] = batch
+
+        lines.append(batch.to_string(index=False))
+
+        print('\n'.join(lines))
+
+        return batch
+
     def estimate_distributed_lags(self, lags: list = [1, 7]) -> Dict:
         """
         Add distributed lag terms to capture dynamic effects.
@@ -217,38 +523,26 @@ class ITSLevelsEstimator:
         Returns:
             Dictionary with distributed lag results
         """
-        print("\n" + "="*60)
-        print("DISTRIBUTED LAG SPECIFICATION")
-        print("="*60)
+        lines = ["\n" + "="*60, "DISTRIBUTED LAG SPECIFICATION", "="*60]
 
-        # Create lag variables
-        for lag in lags:
-            self.data[f'{self.treatment}_lag{lag}'] = self.data[self.treatment].shift(lag)
+        # Create lag variables as NaN-padded arrays
+        treatment = self._base_exog[:, self._base_index[self.treatment]]
+        lag_values = {f"{self.treatment}_lag{lag}": self._lagged(treatment, lag) for lag in lags}
 
-        # Build formula
-        lag_terms = " + ".join([f"{self.treatment}_lag{lag}" for lag in lags])
-        formula = f"""
-        {self.outcome} ~ {self.treatment} + {lag_terms} +
-        D_star + regime_merge + regime_dencun +
-        is_weekend + is_month_end
-        """
+        # Build regressors
+        lag_terms = list(lag_values)
+        columns = ['Intercept', self.treatment] + lag_terms + self._BASE_CONTROLS
 
         # Estimate
-        y, X = dmatrices(formula, data=self.data.dropna(), return_type='dataframe')
+        self._mark_incomplete(lag_values.values())
+        y, X = self._design(columns, extra=lag_values, complete_cases=True)
         model = OLS(y, X)
 
         # HAC standard errors
         n = len(y)
-        bandwidth = int(4 * (n/100)**(2/9))
-
-        dl_results = model.fit(
-            cov_type='HAC',
-            cov_kwds={
-                'kernel': 'bartlett',
-                'use_correction': True,
-                'maxlags': bandwidth
-            }
-        )
+        bandwidth = _andrews_bandwidth(n)
+
+        dl_results = self._hac_results(model.fit(), bandwidth)
 
         # Calculate long-run effect
         long_run_effect = dl_results.params[self.treatment]
@@ -256,7 +550,7 @@ class ITSLevelsEstimator:
             long_run_effect += dl_results.params[f'{self.treatment}_lag{lag}']
 
         # Long-run semi-elasticity
-        lr_semi_elasticity = (np.exp(0.10 * long_run_effect) - 1) * 100
+        lr_semi_elasticity = self._semi_elasticity(long_run_effect)
 
         # Store results
         self.results['distributed_lags'] = {
@@ -268,12 +562,14 @@ class ITSLevelsEstimator:
             'n_obs': len(y)
         }
 
-        print(f"\nRESULTS:")
-        print(f"  Contemporaneous effect: {dl_results.params[self.treatment]:.4f}")
+        lines.append(f"\nRESULTS:")
+        lines.append(f"  Contemporaneous effect: {dl_results.params[self.treatment]:.4f}")
         for lag in lags:
-            print(f"  Lag {lag} effect: {dl_results.params[f'{self.treatment}_lag{lag}']:.4f}")
-        print(f"  Long-run effect: {long_run_effect:.4f}")
-        print(f"  Long-run semi-elasticity (10pp): {lr_semi_elasticity:.2f}%")
+            lines.append(f"  Lag {lag} effect: {dl_results.params[f'{self.treatment}_lag{lag}']:.4f}")
+        lines.append(f"  Long-run effect: {long_run_effect:.4f}")
+        lines.append(f"  Long-run semi-elasticity (10pp): {lr_semi_elasticity:.2f}%")
+
+        print('\n'.join(lines))
 
         return self.results['distributed_lags']
 
@@ -287,37 +583,25 @@ class ITSLevelsEstimator:
                 sign instability from deterministic trends when including the
                 lagged dependent variable.
         """
-        print("\n" + "="*60)
-        print("KOYCK LAG SPECIFICATION")
-        print("="*60)
+        lines = ["\n" + "="*60, "KOYCK LAG SPECIFICATION", "="*60]
 
-        # Add lagged dependent variable
-        self.data['log_base_fee_lag1'] = self.data[self.outcome].shift(1)
-
-        # Build formula with optional time trend control
-        trend_term = " + time_trend" if use_time_trend else ""
-        formula = f"""
-        {self.outcome} ~ log_base_fee_lag1 + {self.treatment} +
-        D_star + regime_merge + regime_dencun +
-        is_weekend + is_month_end{trend_term}
-        """
+        # Build regressors (lagged dependent variable first) with optional
+        # time trend control
+        columns = ['Intercept', 'log_base_fee_lag1', self.treatment] + self._BASE_CONTROLS
+        if use_time_trend:
+            columns.append('time_trend')
 
         # Estimate
-        y, X = dmatrices(formula, data=self.data.dropna(), return_type='dataframe')
+        lagged_outcome = {'log_base_fee_lag1': self._lagged(self._base_y, 1)}
+        self._mark_incomplete(lagged_outcome.values())
+        y, X = self._design(columns, extra=lagged_outcome, complete_cases=True)
         model = OLS(y, X)
 
         # HAC standard errors
         n = len(y)
-        bandwidth = int(4 * (n/100)**(2/9))
-
-        koyck_results = model.fit(
-            cov_type='HAC',
-            cov_kwds={
-                'kernel': 'bartlett',
-                'use_correction': True,
-                'maxlags': bandwidth
-            }
-        )
+        bandwidth = _andrews_bandwidth(n)
+
+        koyck_results = self._hac_results(model.fit(), bandwidth)
 
         # Extract parameters
         rho = koyck_results.params['log_base_fee_lag1']
@@ -326,7 +610,7 @@ class ITSLevelsEstimator:
         # Long-run multiplier
         if rho < 1:
             long_run = short_run / (1 - rho)
-            lr_semi_elasticity = (np.exp(0.10 * long_run) - 1) * 100
+            lr_semi_elasticity = self._semi_elasticity(long_run)
         else:
             long_run = np.nan
             lr_semi_elasticity = np.nan
@@ -342,12 +626,14 @@ class ITSLevelsEstimator:
             'n_obs': len(y)
         }
 
-        print(f"\nRESULTS:")
-        print(f"  ρ (persistence): {rho:.4f}")
-        print(f"  Short-run effect: {short_run:.4f}")
-        print(f"  Long-run effect: {long_run:.4f}")
-        print(f"  Adjustment speed: {1-rho:.4f}")
-        print(f"  Long-run semi-elasticity (10pp): {lr_semi_elasticity:.2f}%")
+        lines.append(f"\nRESULTS:")
+        lines.append(f"  ρ (persistence): {rho:.4f}")
+        lines.append(f"  Short-run effect: {short_run:.4f}")
+        lines.append(f"  Long-run effect: {long_run:.4f}")
+        lines.append(f"  Adjustment speed: {1-rho:.4f}")
+        lines.append(f"  Long-run semi-elasticity (10pp): {lr_semi_elasticity:.2f}%")
+
+        print('\n'.join(lines))
 
         return self.results['koyck']
 
@@ -362,17 +648,10 @@ class ITSLevelsEstimator:
         Returns:
             Dictionary with ARIMA results
         """
-        print("\n" + "="*60)
-        print(f"AR({ar_order},{ma_order}) ERROR MODEL")
-        print("="*60)
-
-        # Prepare data - use simpler formula for ARIMA
-        formula = f"""
-        {self.outcome} ~ {self.treatment} + D_star +
-        regime_merge + regime_dencun + is_weekend + is_month_end
-        """
+        lines = ["\n" + "="*60, f"AR({ar_order},{ma_order}) ERROR MODEL", "="*60]
 
-        y, X = dmatrices(formula, data=self.data, return_type='dataframe')
+        # Prepare data - use simpler regressor set for ARIMA
+        y, X = self._design(self._main_cols)
 
         # Remove intercept as ARIMA adds its own
         X = X.iloc[:, 1:]
@@ -386,7 +665,11 @@ class ITSLevelsEstimator:
         )
 
         try:
-            arima_results = arima_model.fit()
+            # Small BLAS ops inside the Kalman filter are slowed by threading
+            # Suppress convergence warnings for ARIMA
+            with threadpool_limits(limits=1, user_api='blas'), warnings.catch_warnings():
+                warnings.simplefilter('ignore', category=UserWarning)
+                arima_results = arima_model.fit()
 
             # Extract treatment effect
             # Treatment is first column in X
@@ -394,7 +677,7 @@ class ITSLevelsEstimator:
             se = arima_results.bse[1]
 
             # Semi-elasticity
-            semi_elasticity = (np.exp(0.10 * beta) - 1) * 100
+            semi_elasticity = self._semi_elasticity(beta)
 
             # Store results
             self.results['arima'] = {
@@ -409,93 +692,93 @@ class ITSLevelsEstimator:
                 'n_obs': len(y)
             }
 
-            print(f"\nRESULTS:")
-            print(f"  β (A_t coefficient): {beta:.4f}")
-            print(f"  SE: {se:.4f}")
-            print(f"  Semi-elasticity (10pp): {semi_elasticity:.2f}%")
+            lines.append(f"\nRESULTS:")
+            lines.append(f"  β (A_t coefficient): {beta:.4f}")
+            lines.append(f"  SE: {se:.4f}")
+            lines.append(f"  Semi-elasticity (10pp): {semi_elasticity:.2f}%")
             if ar_order > 0:
-                print(f"  AR parameters: {arima_results.arparams}")
+                lines.append(f"  AR parameters: {arima_results.arparams}")
             if ma_order > 0:
-                print(f"  MA parameters: {arima_results.maparams}")
-            print(f"  AIC: {arima_results.aic:.2f}")
-            print(f"  BIC: {arima_results.bic:.2f}")
+                lines.append(f"  MA parameters: {arima_results.maparams}")
+            lines.append(f"  AIC: {arima_results.aic:.2f}")
+            lines.append(f"  BIC: {arima_results.bic:.2f}")
 
         except Exception as e:
-            print(f"  Warning: ARIMA estimation failed: {e}")
+            lines.append(f"  Warning: ARIMA estimation failed: {e}")
             self.results['arima'] = None
 
+        print('\n'.join(lines))
+
         return self.results.get('arima', {})
 
-    def estimate_arma_grid(self, max_p: int = 3, max_q: int = 2, lb_lags: int = 10) -> Dict:
+    def estimate_arma_grid(self, max_p: int = 3, max_q: int = 2, lb_lags: int = 10,
+                           n_jobs: int = -1, warm_start: bool = False,
+                           screen_method: Optional[str] = None) -> Dict:
         """
         Grid search ARMA(p,q) error structures for the levels spec with exogenous regressors.
 
         Tries ARIMA(endog, exog, order=(p,0,q)) for p in [0..max_p], q in [0..max_q],
         collects AIC/BIC, treatment beta and SE, Durbin–Watson, and Ljung–Box p-values.
         Selects the best order by AIC (tie-break by larger Ljung–Box p at the largest lag).
+        AR orders run in parallel via joblib (``n_jobs`` workers). With
+        ``warm_start`` MA orders within each start from the previous fit; this
+        is faster but can change the selected order, so the published grid
+        uses the statsmodels default starting values.
+
+        By default every order is fit by full state-space MLE. A cheap
+        regression-based ``screen_method`` (e.g. 'hannan_rissanen'; AIC is
+        still the exact likelihood at those estimates) can be given instead:
+        the leading order is then re-fit by MLE and the grid re-ranked until
+        the top row is an MLE fit, so the selected row is the AIC minimum of
+        the returned grid. Rows never re-fit keep their screening estimates;
+        the grid's ``estimation`` column records which method produced each.
 
         Returns a dict with the grid as a DataFrame and the selected order + summary.
         """
-        print("\n" + "="*60)
-        print(f"ARMA(p,q) ERROR GRID (p<= {max_p}, q<= {max_q})")
-        print("="*60)
+        lines = ["\n" + "="*60, f"ARMA(p,q) ERROR GRID (p<= {max_p}, q<= {max_q})", "="*60]
 
         # Prepare design consistent with estimate_ar_errors
-        formula = f"""
-        {self.outcome} ~ {self.treatment} + D_star +
-        regime_merge + regime_dencun + is_weekend + is_month_end
-        """
-        y, X = dmatrices(formula, data=self.data, return_type='dataframe')
+        y, X = self._design(self._main_cols)
         # Remove intercept as ARIMA adds its own constant
         X_exog = X.iloc[:, 1:]
         y_vec = y.values.flatten()
 
-        rows = []
-        for p in range(0, max_p + 1):
-            for q in range(0, max_q + 1):
-                # skip the trivial (0,0) case since OLS already reported
-                if p == 0 and q == 0:
-                    continue
-                try:
-                    arima_model = ARIMA(endog=y_vec, exog=X_exog.values, order=(p, 0, q), trend='c')
-                    res = arima_model.fit()
-                    # Treatment coefficient is first column in X_exog
-                    beta = float(res.params[1])
-                    se = float(res.bse[1])
-                    aic = float(res.aic)
-                    bic = float(res.bic)
-                    resid = pd.Series(res.resid)
-                    dw = float(durbin_watson(resid))
-                    lb = acorr_ljungbox(resid, lags=lb_lags, return_df=True)
-                    lb_p_at_max = float(lb['lb_pvalue'].iloc[-1])
-                    lb_p_min = float(lb['lb_pvalue'].min())
-                    rows.append({
-                        'p': p, 'q': q,
-                        'beta': beta, 'se': se,
-                        'aic': aic, 'bic': bic, 'dw': dw,
-                        'lb_p_at_maxlag': lb_p_at_max,
-                        'lb_p_min': lb_p_min,
-                        'n': int(res.nobs)
-                    })
-                except Exception as e:
-                    rows.append({
-                        'p': p, 'q': q, 'beta': np.nan, 'se': np.nan,
-                        'aic': np.inf, 'bic': np.inf, 'dw': np.nan,
-                        'lb_p_at_maxlag': np.nan, 'lb_p_min': np.nan,
-                        'n': int(len(y_vec))
-                    })
+        # One worker per AR order, fitting its MA orders in turn
+        X_vals = X_exog.values
+        row_blocks = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(_fit_arma_row)(p, max_q, y_vec, X_vals, lb_lags, warm_start,
+                                   screen_method or 'statespace')
+            for p in range(max_p + 1)
+        )
+        rows = [row for block in row_blocks for row in block]
 
         grid = pd.DataFrame(rows)
         # Select by AIC, break ties by higher lb_p_at_maxlag
         grid_sorted = grid.sort_values(['aic', 'lb_p_at_maxlag'], ascending=[True, False]).reset_index(drop=True)
+
+        if screen_method is not None and screen_method != 'statespace':
+            # Re-fit the leading screened order by full MLE and re-rank until
+            # an MLE fit leads, so screening AICs never beat an MLE AIC
+            with threadpool_limits(limits=1, user_api='blas'):
+                while (grid_sorted.loc[0, 'estimation'] != 'statespace'
+                       and np.isfinite(grid_sorted.loc[0, 'aic'])):
+                    p_top, q_top = int(grid_sorted.loc[0, 'p']), int(grid_sorted.loc[0, 'q'])
+                    # A failed re-fit gets an infinite AIC and drops out
+                    mle_row, _ = _fit_one_arma(p_top, q_top, y_vec, X_vals, lb_lags)
+                    is_top = (grid['p'] == p_top) & (grid['q'] == q_top)
+                    grid.loc[is_top, list(mle_row)] = list(mle_row.values())
+                    grid_sorted = grid.sort_values(['aic', 'lb_p_at_maxlag'], ascending=[True, False]).reset_index(drop=True)
+
         best = grid_sorted.iloc[0].to_dict()
 
         self.results['arma_grid'] = grid
         self.results['arma_best'] = best
 
-        print("\nARMA grid (top 5 by AIC):")
-        print(grid_sorted.head(5).to_string(index=False))
-        print(f"\nSelected ARMA(p,q) = ({int(best['p'])},{int(best['q'])}), AIC={best['aic']:.1f}, LB p@{lb_lags}={best['lb_p_at_maxlag']:.3f}")
+        lines.append("\nARMA grid (top 5 by AIC):")
+        lines.append(grid_sorted.head(5).to_string(index=False))
+        lines.append(f"\nSelected ARMA(p,q) = ({int(best['p'])},{int(best['q'])}), AIC={best['aic']:.1f}, LB p@{lb_lags}={best['lb_p_at_maxlag']:.3f}")
+
+        print('\n'.join(lines))
 
         return {'grid': grid, 'best': best}
 
@@ -503,43 +786,27 @@ class ITSLevelsEstimator:
         """
         Feasible GLS with AR(1) errors using Cochrane-Orcutt procedure.
         """
-        print("\n" + "="*60)
-        print("FGLS WITH AR(1) ERRORS")
-        print("="*60)
+        lines = ["\n" + "="*60, "FGLS WITH AR(1) ERRORS", "="*60]
 
         # Initial OLS
-        formula = f"""
-        {self.outcome} ~ {self.treatment} + D_star +
-        regime_merge + regime_dencun + is_weekend + is_month_end
-        """
-
-        y, X = dmatrices(formula, data=self.data, return_type='dataframe')
+        y, X = self._design(self._main_cols)
 
-        # Step 1: Initial OLS
-        ols_model = OLS(y, X)
-        ols_results = ols_model.fit()
+        # Step 1: Initial OLS (only the residuals are needed)
+        _, residuals, _ = _ols_beta_cholesky(X.values, y.values)
 
-        # Step 2: Estimate AR(1) coefficient
-        residuals = ols_results.resid.values
-        rho = np.corrcoef(residuals[:-1], residuals[1:])[0, 1]
+        # Step 2: Estimate AR(1) coefficient (residuals have mean zero, so a
+        # single dot-product ratio replaces the corrcoef matrix)
+        rho = float(residuals[:-1] @ residuals[1:] / (residuals @ residuals))
 
-        print(f"  Estimated ρ: {rho:.4f}")
+        lines.append(f"  Estimated ρ: {rho:.4f}")
 
         # Step 3: Transform variables (Prais-Winsten)
         n = len(y)
-
-        # First observation transformation
-        y_vals = y.values.flatten()  # Ensure 1D array
-        y_transformed = np.zeros(n)
-        y_transformed[0] = np.sqrt(1 - rho**2) * y_vals[0]
-        y_transformed[1:] = y_vals[1:] - rho * y_vals[:-1]
-
-        X_transformed = np.zeros_like(X.values)
-        X_transformed[0, :] = np.sqrt(1 - rho**2) * X.values[0, :]
-        X_transformed[1:, :] = X.values[1:, :] - rho * X.values[:-1, :]
+        y_transformed = self._prais_winsten(y.values, rho)
+        X_transformed = self._prais_winsten(X.values, rho)
 
         # Step 4: FGLS estimation
-        fgls_model = OLS(y_transformed.flatten(), X_transformed)
+        fgls_model = OLS(y_transformed, X_transformed)
         fgls_results = fgls_model.fit()
 
         # Extract treatment effect (find column index)
@@ -548,7 +815,7 @@ class ITSLevelsEstimator:
         se = fgls_results.bse[treat_idx]
 
         # Semi-elasticity
-        semi_elasticity = (np.exp(0.10 * beta) - 1) * 100
+        semi_elasticity = self._semi_elasticity(beta)
 
         # Durbin-Watson on transformed residuals
         dw = durbin_watson(fgls_results.resid)
@@ -564,11 +831,13 @@ class ITSLevelsEstimator:
             'n_obs': n
         }
 
-        print(f"\nRESULTS:")
-        print(f"  β (A_t coefficient): {beta:.4f}")
-        print(f"  SE: {se:.4f}")
-        print(f"  Semi-elasticity (10pp): {semi_elasticity:.2f}%")
-        print(f"  Durbin-Watson: {dw:.4f}")
+        lines.append(f"\nRESULTS:")
+        lines.append(f"  β (A_t coefficient): {beta:.4f}")
+        lines.append(f"  SE: {se:.4f}")
+        lines.append(f"  Semi-elasticity (10pp): {semi_elasticity:.2f}%")
+        lines.append(f"  Durbin-Watson: {dw:.4f}")
+
+        print('\n'.join(lines))
 
         return self.results['fgls']
 
@@ -577,34 +846,35 @@ class ITSLevelsEstimator:
         First-differences specification as robustness check.
         Includes translation box for interpretation.
         """
-        print("\n" + "="*60)
-        print("FIRST-DIFFERENCES ROBUSTNESS")
-        print("="*60)
-
-        # Create differenced variables
-        self.data['d_log_base_fee'] = self.data[self.outcome].diff()
-        self.data['d_A_t'] = self.data[self.treatment].diff()
-        self.data['d_D_star'] = self.data['D_star'].diff()
+        lines = ["\n" + "="*60, "FIRST-DIFFERENCES ROBUSTNESS", "="*60]
+
+        # Create differenced variables as slice subtractions into
+        # preallocated buffers (first row undefined)
+        diffs = {}
+        for name, values in [('d_log_base_fee', self._base_y),
+                             ('d_A_t', self._base_exog[:, self._base_index[self.treatment]]),
+                             ('d_D_star', self._base_exog[:, self._base_index['D_star']])]:
+            d = np.empty_like(values)
+            d[0] = np.nan
+            np.subtract(values[1:], values[:-1], out=d[1:])
+            diffs[name] = d
 
         # Simple differences specification
-        formula = "d_log_base_fee ~ d_A_t + d_D_star"
-
-        # Estimate
-        y, X = dmatrices(formula, data=self.data.dropna(), return_type='dataframe')
+        self._mark_incomplete(diffs.values())
+        y, X = self._design(
+            ['Intercept', 'd_A_t', 'd_D_star'],
+            extra=diffs,
+            y=diffs['d_log_base_fee'],
+            y_name='d_log_base_fee',
+            complete_cases=True
+        )
         model = OLS(y, X)
 
         # HAC standard errors
         n = len(y)
-        bandwidth = int(4 * (n/100)**(2/9))
-
-        diff_results = model.fit(
-            cov_type='HAC',
-            cov_kwds={
-                'kernel': 'bartlett',
-                'use_correction': True,
-                'maxlags': bandwidth
-            }
-        )
+        bandwidth = _andrews_bandwidth(n)
+
+        diff_results = self._hac_results(model.fit(), bandwidth)
 
         # Extract treatment effect
         beta_diff = diff_results.params['d_A_t']
@@ -622,18 +892,104 @@ class ITSLevelsEstimator:
             'n_obs': len(y)
         }
 
-        print(f"\nRESULTS:")
-        print(f"  β (Δ A_t coefficient): {beta_diff:.4f}")
-        print(f"  SE (HAC, bw={bandwidth}): {se_diff:.4f}")
-        print(f"\nTRANSLATION BOX:")
-        print(f"  Specification: First Differences")
-        print(f"  Interpretation: Change-on-change elasticity")
-        print(f"  Mapping to levels: β_diff ≈ short-run β_levels")
-        print(f"  Key difference: Removes time-invariant heterogeneity")
-        print(f"  Caution: May amplify measurement error")
+        lines.append(f"\nRESULTS:")
+        lines.append(f"  β (Δ A_t coefficient): {beta_diff:.4f}")
+        lines.append(f"  SE (HAC, bw={bandwidth}): {se_diff:.4f}")
+        lines.append(f"\nTRANSLATION BOX:")
+        lines.append(f"  Specification: First Differences")
+        lines.append(f"  Interpretation: Change-on-change elasticity")
+        lines.append(f"  Mapping to levels: β_diff ≈ short-run β_levels")
+        lines.append(f"  Key difference: Removes time-invariant heterogeneity")
+        lines.append(f"  Caution: May amplify measurement error")
+
+        print('\n'.join(lines))
 
         return self.results['differences']
 
+    def _hac_results(self, ols_results, bandwidth: int):
+        """
+        Attach Bartlett-kernel HAC covariance to an existing OLS fit.
+
+        Equivalent to ``fit(cov_type='HAC')`` but reuses the fitted parameters
+        and residuals instead of solving the least-squares problem again; the
+        sandwich itself comes from _hac_sandwich.
+
+        Args:
+            ols_results: Fitted OLS results
+            bandwidth: HAC maximum lag
+
+        Returns:
+            Results wrapper with HAC standard errors
+        """
+        ols = ols_results._results
+        hac_results = ols.__class__(
+            ols.model,
+            ols.params,
+            normalized_cov_params=ols.normalized_cov_params,
+            scale=ols.scale
+        )
+        hac_results.cov_type = 'HAC'
+        hac_results.use_t = False
+        hac_results.cov_kwds = {
+            'use_t': False,
+            'adjust_df': False,
+            'maxlags': bandwidth,
+            'kernel': 'bartlett',
+            'use_correction': True,
+            'description': (
+                'Standard Errors are heteroscedasticity and autocorrelation '
+                f'robust (HAC) using {bandwidth} lags and with small sample correction'
+            )
+        }
+        hac_results.cov_params_default = _hac_sandwich(
+            ols.model.exog, ols.resid, bandwidth, ols.normalized_cov_params
+        )
+        return RegressionResultsWrapper(hac_results)
+
+    def _design(self, columns: list,
+                extra: Optional[Dict[str, np.ndarray]] = None,
+                y: Optional[np.ndarray] = None,
+                y_name: Optional[str] = None,
+                complete_cases: bool = False) -> Tuple[pd.Series, pd.DataFrame]:
+        """
+        Slice the cached design matrix for one specification.
+
+        Args:
+            columns: Regressor names in order; names outside the cached design
+                are taken from ``extra``
+            extra: Additional regressor arrays (e.g. lags) aligned with self.data
+            y: Outcome array (defaults to the cached outcome)
+            y_name: Outcome name when ``y`` is given
+            complete_cases: Also drop rows missing any panel column or any
+                helper created so far (the old self.data.dropna() sample)
+
+        Returns:
+            Tuple of (y, X) with rows containing missing values dropped
+        """
+        extra = extra or {}
+        if y is None:
+            y, y_name = self._base_y, self.outcome
+
+        X = np.column_stack([
+            self._base_exog[:, self._base_index[col]] if col in self._base_index
+            else np.asarray(extra[col], dtype=np.float64)
+            for col in columns
+        ])
+
+        # Drop incomplete rows for the variables actually used
+        keep = ~(np.isnan(y) | np.isnan(X).any(axis=1))
+        if complete_cases:
+            keep &= self._complete_rows
+        index = self.data.index[keep]
+
+        return (pd.Series(y[keep], index=index, name=y_name),
+                pd.DataFrame(X[keep], index=index, columns=columns))
+
+    def _mark_incomplete(self, helpers) -> None:
+        """Drop rows where any of the helper arrays is missing from the complete-case sample."""
+        for values in helpers:
+            self._complete_rows = self._complete_rows & ~np.isnan(values)
+
     def _create_translation_box(self, beta_diff: float, se_diff: float) -> Dict:
         """
         Create translation box between levels and differences specifications.
@@ -678,7 +1034,39 @@ class ITSLevelsEstimator:
 
         return translation
 
-    def _delta_method_se(self, beta: float, se_beta: float) -> float:
+    @staticmethod
+    def _lagged(values: np.ndarray, lag: int) -> np.ndarray:
+        """Lag a series by ``lag`` rows, padding the start with NaN."""
+        lagged = np.empty_like(values)
+        lagged[:lag] = np.nan
+        lagged[lag:] = values[:len(values) - lag]
+        return lagged
+
+    @staticmethod
+    def _prais_winsten(values: np.ndarray, rho: float) -> np.ndarray:
+        """
+        Prais-Winsten transform of a series or design matrix.
+
+        Rows 1..n-1 are quasi-differenced and the first row is rescaled by
+        sqrt(1 - rho^2). Every element is written exactly once into an
+        uninitialized buffer.
+        """
+        transformed = np.empty_like(values)
+        np.multiply(values[:-1], -rho, out=transformed[1:])
+        transformed[1:] += values[1:]
+        transformed[0] = np.sqrt(1 - rho * rho) * values[0]
+        return transformed
+
+    @staticmethod
+    def _semi_elasticity(beta):
+        """
+        Semi-elasticity of a 10pp treatment increase: 100 * (exp(0.10 * β) - 1).
+
+        Accepts a scalar or an array of coefficients.
+        """
+        return (np.exp(0.10 * np.asarray(beta)) - 1) * 100
+
+    def _delta_method_se(self, beta, se_beta):
         """
         Calculate standard error for semi-elasticity using delta method.
 
@@ -687,14 +1075,14 @@ class ITSLevelsEstimator:
         SE[g(β)] ≈ |g'(β)| * SE[β]
 
         Args:
-            beta: Coefficient estimate
-            se_beta: Standard error of coefficient
+            beta: Coefficient estimate (scalar or array)
+            se_beta: Standard error of coefficient (scalar or array)
 
         Returns:
             Standard error of semi-elasticity
         """
-        derivative = 10 * np.exp(0.10 * beta)
-        return derivative * se_beta
+        derivative = 10 * np.exp(0.10 * np.asarray(beta))
+        return derivative * np.asarray(se_beta)
 
     def _run_diagnostics(self, model_results):
         """
@@ -702,23 +1090,26 @@ class ITSLevelsEstimator:
 
         Args:
             model_results: Fitted model results
+
+        Returns:
+            Report lines for the caller's printed summary
         """
-        residuals = model_results.resid
+        residuals = np.asarray(model_results.resid)
 
         # Autocorrelation test
-        lb_test = acorr_ljungbox(residuals, lags=10, return_df=True)
+        lb_stat, lb_pvalue = _ljung_box(residuals, 10)
 
         # Heteroskedasticity test
-        white_test = het_white(residuals, model_results.model.exog)
+        white_test = _white_test(residuals, model_results.model.exog)
 
         # Durbin-Watson
         dw = durbin_watson(residuals)
 
         # Store diagnostics
         self.diagnostics['ljung_box'] = {
-            'statistic': lb_test['lb_stat'].values,
-            'pvalue': lb_test['lb_pvalue'].values,
-            'significant': (lb_test['lb_pvalue'] < 0.05).any()
+            'statistic': lb_stat,
+            'pvalue': lb_pvalue,
+            'significant': (lb_pvalue < 0.05).any()
         }
 
         self.diagnostics['white_test'] = {
@@ -729,15 +1120,17 @@ class ITSLevelsEstimator:
 
         self.diagnostics['durbin_watson'] = dw
 
-        print(f"\nDIAGNOSTICS:")
-        print(f"  Ljung-Box (10 lags): p = {lb_test['lb_pvalue'].min():.4f}")
-        print(f"  White test: p = {white_test[1]:.4f}")
-        print(f"  Durbin-Watson: {dw:.4f}")
+        lines = [f"\nDIAGNOSTICS:"]
+        lines.append(f"  Ljung-Box (10 lags): p = {lb_pvalue.min():.4f}")
+        lines.append(f"  White test: p = {white_test[1]:.4f}")
+        lines.append(f"  Durbin-Watson: {dw:.4f}")
 
         if self.diagnostics['ljung_box']['significant']:
-            print("  ⚠ Warning: Significant autocorrelation detected")
+            lines.append("  ⚠ Warning: Significant autocorrelation detected")
         if self.diagnostics['white_test']['significant']:
-            print("  ⚠ Warning: Heteroskedasticity detected")
+            lines.append("  ⚠ Warning: Heteroskedasticity detected")
+
+        return lines
 
     def generate_table_3(self, save_path: Optional[Path] = None) -> pd.DataFrame:
         """
@@ -749,9 +1142,7 @@ class ITSLevelsEstimator:
         Returns:
             Results dataframe
         """
-        print("\n" + "="*60)
-        print("GENERATING TABLE 3: LEVELS SPECIFICATION")
-        print("="*60)
+        lines = ["\n" + "="*60, "GENERATING TABLE 3: LEVELS SPECIFICATION", "="*60]
 
         # Collect results
         results_data = []
@@ -828,9 +1219,9 @@ class ITSLevelsEstimator:
             "All specifications include demand factor (D*) and regime/calendar controls."
         ]
 
-        print("\nTABLE 3 PREVIEW:")
-        print(table3.to_string(index=False))
-        print("\n" + "\n".join(notes))
+        lines.append("\nTABLE 3 PREVIEW:")
+        lines.append(table3.to_string(index=False))
+        lines.append("\n" + "\n".join(notes))
 
         # Save if path provided
         if save_path:
@@ -864,7 +1255,9 @@ class ITSLevelsEstimator:
 
             table3.to_csv(save_path.with_suffix('.csv'), index=False)
 
-            print(f"\nTable saved to: {save_path}")
+            lines.append(f"\nTable saved to: {save_path}")
+
+        print('\n'.join(lines))
 
         return table3
 
@@ -905,9 +1298,10 @@ class ITSLevelsEstimator:
                 else:
                     summary['results'][key] = self.results[key]
 
-        # Save YAML summary
+        # Save YAML summary (large arrays go to companion .npz files)
         with open(output_dir / 'its_levels_results.yaml', 'w') as f:
-            yaml.dump(summary, f, default_flow_style=False)
+            yaml.dump(_yaml_safe(summary, output_dir), f,
+                      Dumper=_YAML_DUMPER, default_flow_style=False)
 
         print(f"\nResults saved to: {output_dir}")
 
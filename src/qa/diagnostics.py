@@ -16,10 +16,28 @@ Used by: tests/gates/test_g4_diagnostics.py and other QA checks
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Optional, Union
+import scipy.fft
+import scipy.linalg
 from scipy import stats
 from scipy.stats import norm, chi2
 import warnings
 
+try:
+    from statsmodels.tsa.stattools import adfuller
+    HAS_STATSMODELS = True
+except ImportError:
+    HAS_STATSMODELS = False
+
+
+def _as_float64_contig(x: Union[np.ndarray, pd.Series]) -> np.ndarray:
+    """
+    View x as a C-contiguous float64 array (no copy if it already is one).
+
+    Integer input is promoted once here rather than inside every FFT or dot
+    product downstream.
+    """
+    return np.ascontiguousarray(x, dtype=np.float64)
+
 
 # ============================================================================
 # Time Series Diagnostics
@@ -28,45 +46,62 @@ import warnings
 def compute_acf(
     x: Union[np.ndarray, pd.Series],
     nlags: int = 40,
-    fft: bool = True
+    fft: Union[bool, str] = True
 ) -> np.ndarray:
     """
     Compute autocorrelation function (ACF).
 
     Args:
-        x: Time series data
+        x: Time series data, or a 2-D array with one series per row
+            (all rows are transformed in one batched FFT)
         nlags: Number of lags to compute
-        fft: Use FFT for computation (faster for long series)
+        fft: Use FFT for computation (faster for long series), or 'auto'
+            to pick FFT vs direct from the series length and nlags
 
     Returns:
-        Array of ACF values for lags 0 to nlags
+        Array of ACF values for lags 0 to nlags (along the last axis)
 
     Note:
         ACF at lag 0 is always 1.0
     """
-    if isinstance(x, pd.Series):
-        x = x.values
+    x = _as_float64_contig(x)
 
     # Demean
-    x = x - x.mean()
-    n = len(x)
+    return _acf_demeaned(x - x.mean(axis=-1, keepdims=True), nlags, fft)
+
+
+def _acf_demeaned(x: np.ndarray, nlags: int, fft: Union[bool, str] = True) -> np.ndarray:
+    """
+    ACF of an already demeaned series (see compute_acf).
+
+    Lets callers that have demeaned the data themselves skip a second
+    subtract pass and its temporary.
+    """
+    n = x.shape[-1]
+
+    if fft == "auto":
+        # Below ~2 log2(n) lags the direct products are cheaper than a
+        # padded FFT over the whole series
+        fft = nlags >= 2 * np.log2(n)
 
     if fft:
-        # FFT-based computation (faster)
-        # Pad with zeros to avoid circular correlation
-        nfft = 2 ** int(np.ceil(np.log2(2 * n)))
-        xfft = np.fft.fft(x, n=nfft)
-        acf = np.fft.ifft(xfft * np.conj(xfft)).real[:n]
-        acf = acf / acf[0]
+        # Real FFT of the zero-padded series (padding avoids circular
+        # correlation); next_fast_len picks the smallest 5-smooth size
+        nfft = scipy.fft.next_fast_len(2 * n - 1, real=True)
+        xfft = scipy.fft.rfft(x, n=nfft, axis=-1)
+        acf = scipy.fft.irfft(xfft * np.conj(xfft), n=nfft, axis=-1)[..., :n]
+        acf = acf / acf[..., :1]
     else:
-        # Direct computation
-        c0 = np.dot(x, x) / n
-        acf = np.array([1.0] + [
-            np.dot(x[:-k], x[k:]) / (n * c0)
-            for k in range(1, min(nlags + 1, n))
-        ])
+        # Direct computation: row k of the strided window view over the
+        # zero-padded series is x shifted by k, so every lag comes out of
+        # one matrix-vector product
+        max_lag = min(nlags, n - 1)
+        padded = np.concatenate([x, np.zeros(x.shape[:-1] + (max_lag,))], axis=-1)
+        shifted = np.lib.stride_tricks.sliding_window_view(padded, n, axis=-1)
+        acov = np.einsum('...ki,...i->...k', shifted, x)
+        acf = acov / acov[..., :1]
 
-    return acf[:nlags + 1]
+    return acf[..., :nlags + 1]
 
 
 def compute_pacf(
@@ -88,50 +123,53 @@ def compute_pacf(
     Note:
         PACF at lag 0 is always 1.0
     """
-    if isinstance(x, pd.Series):
-        x = x.values
+    x = _as_float64_contig(x)
 
     x = x - x.mean()
 
     if method == "ywunbiased":
-        # Yule-Walker equations with unbiased ACF estimates
-        acf_vals = compute_acf(x, nlags=nlags, fft=True)
-        pacf = np.zeros(nlags + 1)
+        # Yule-Walker equations with unbiased ACF estimates, solved for all
+        # orders at once by the Levinson-Durbin recursion
+        acf_vals = _acf_demeaned(x, nlags=nlags, fft=True)
+        pacf = np.full(nlags + 1, np.nan)
         pacf[0] = 1.0
 
+        phi = np.zeros(nlags)
+        sigma2 = acf_vals[0]
         for k in range(1, nlags + 1):
-            if k == 1:
-                pacf[k] = acf_vals[1]
-            else:
-                # Solve Yule-Walker equations
-                R = np.array([[acf_vals[abs(i - j)] for j in range(k)] for i in range(k)])
-                r = acf_vals[1:k + 1]
-                try:
-                    phi = np.linalg.solve(R, r)
-                    pacf[k] = phi[-1]
-                except np.linalg.LinAlgError:
-                    pacf[k] = np.nan
+            if not sigma2 > 0:
+                # Singular Toeplitz system: higher orders are undefined
+                break
+            kappa = (acf_vals[k] - phi[:k - 1] @ acf_vals[k - 1:0:-1]) / sigma2
+            pacf[k] = kappa
+            phi[:k - 1] -= kappa * phi[:k - 1][::-1]
+            phi[k - 1] = kappa
+            sigma2 *= 1 - kappa ** 2
 
     elif method == "ols":
-        # OLS regression method
-        pacf = np.zeros(nlags + 1)
+        # OLS regression method: regress x_t on x_{t-1}, ..., x_{t-k} over
+        # the common sample t = max_lag..n-1. PACF at lag k is the coefficient
+        # on x_{t-k}. One QR of the full lag matrix serves every k, since
+        # truncating to the first k lags only truncates R and Q'y.
+        pacf = np.full(nlags + 1, np.nan)
         pacf[0] = 1.0
 
-        for k in range(1, min(nlags + 1, len(x))):
-            # Regress x[k:] on x[k-1:n-1], ..., x[0:n-k]
-            # PACF is the coefficient on x[0:n-k]
-            y = x[k:]
-            X = np.column_stack([x[i:len(x) - k + i] for i in range(k)])
-
-            if len(y) < k + 1:
-                pacf[k] = np.nan
-                continue
-
-            try:
-                beta = np.linalg.lstsq(X, y, rcond=None)[0]
-                pacf[k] = beta[-1]
-            except np.linalg.LinAlgError:
-                pacf[k] = np.nan
+        # Short series: only orders whose common sample still has more
+        # observations than regressors are estimated; higher lags stay NaN
+        max_lag = min(nlags, (len(x) - 1) // 2)
+        if max_lag > 0:
+            windows = np.lib.stride_tricks.sliding_window_view(x, max_lag + 1)
+            y = windows[:, max_lag]
+            X = windows[:, max_lag - 1::-1]
+            Q, R = np.linalg.qr(X)
+            qty = Q.T @ y
+
+            for k in range(1, max_lag + 1):
+                try:
+                    beta = scipy.linalg.solve_triangular(R[:k, :k], qty[:k], lower=False)
+                    pacf[k] = beta[-1]
+                except np.linalg.LinAlgError:
+                    pacf[k] = np.nan
 
     else:
         raise ValueError(f"Unknown PACF method: {method}")
@@ -142,7 +180,8 @@ def compute_pacf(
 def adf_test(
     x: Union[np.ndarray, pd.Series],
     maxlag: Optional[int] = None,
-    regression: str = "c"
+    regression: str = "c",
+    autolag: Optional[str] = "AIC"
 ) -> Dict[str, float]:
     """
     Augmented Dickey-Fuller test for stationarity.
@@ -151,6 +190,11 @@ def adf_test(
         x: Time series data
         maxlag: Maximum lag to include in test regression
         regression: Type of regression ('c': constant, 'ct': constant+trend, 'nc': no constant)
+        autolag: Lag selection criterion passed to adfuller ('AIC', 'BIC',
+            't-stat'), or None to use exactly ``maxlag`` lags. When the lag
+            is already chosen, pass it with autolag=None: the automatic
+            search refits the regression for every lag up to maxlag and
+            dominates the runtime
 
     Returns:
         Dict with test statistic, p-value, critical values, and decision
@@ -160,31 +204,27 @@ def adf_test(
         H1: Series is stationary
         Reject H0 if p-value < 0.05
     """
-    try:
-        from statsmodels.tsa.stattools import adfuller
-
-        if isinstance(x, pd.Series):
-            x = x.values
-
-        # Remove NaNs
-        x = x[~np.isnan(x)]
+    x = _as_float64_contig(x)
 
-        result = adfuller(x, maxlag=maxlag, regression=regression)
+    # Remove NaNs
+    x = x[~np.isnan(x)]
 
-        return {
-            "test_statistic": result[0],
-            "p_value": result[1],
-            "n_lags": result[2],
-            "n_obs": result[3],
-            "critical_values": result[4],
-            "stationary": result[1] < 0.05,  # Reject unit root at 5% level
-        }
-
-    except ImportError:
+    if not HAS_STATSMODELS:
         warnings.warn("statsmodels not available, using simplified ADF test")
         # Simplified Dickey-Fuller (no augmentation)
         return _simple_df_test(x, regression)
 
+    result = adfuller(x, maxlag=maxlag, regression=regression, autolag=autolag)
+
+    return {
+        "test_statistic": result[0],
+        "p_value": result[1],
+        "n_lags": result[2],
+        "n_obs": result[3],
+        "critical_values": result[4],
+        "stationary": result[1] < 0.05,  # Reject unit root at 5% level
+    }
+
 
 def _simple_df_test(x: np.ndarray, regression: str = "c") -> Dict[str, float]:
     """
@@ -192,53 +232,84 @@ def _simple_df_test(x: np.ndarray, regression: str = "c") -> Dict[str, float]:
 
     This is a fallback if statsmodels is not available.
     """
-    n = len(x)
-    y = np.diff(x)
+    return _batch_simple_df_test(np.asarray(x)[:, None], regression)[0]
+
+
+def _batch_simple_df_test(x: np.ndarray, regression: str = "c") -> List[Dict[str, float]]:
+    """
+    Simplified Dickey-Fuller test for every column of x at once.
+
+    The deterministic terms are partialled out of diff(x) and the lagged
+    level (Frisch-Waugh), so the coefficient on the lag is a ratio of column
+    sums and no per-series design matrix or least-squares solve is needed.
+
+    Args:
+        x: Series matrix (n x m), one series per column
+        regression: Type of regression ('c', 'ct', 'nc')
+
+    Returns:
+        One result dict per column, as returned by _simple_df_test
+    """
+    n = x.shape[0]
+    y = np.diff(x, axis=0)
     x_lag = x[:-1]
 
-    # Build design matrix
+    # Partial out the deterministic terms
     if regression == "c":
-        X = np.column_stack([np.ones(n - 1), x_lag])
+        k = 2
+        y_r = y - y.mean(axis=0)
+        x_r = x_lag - x_lag.mean(axis=0)
     elif regression == "ct":
-        X = np.column_stack([np.ones(n - 1), np.arange(n - 1), x_lag])
+        k = 3
+        trend = np.arange(n - 1) - (n - 2) / 2
+        trend = (trend / np.sqrt(trend @ trend))[:, None]
+        y_r = y - y.mean(axis=0)
+        x_r = x_lag - x_lag.mean(axis=0)
+        y_r -= trend * (trend.T @ y_r)
+        x_r -= trend * (trend.T @ x_r)
     elif regression == "nc":
-        X = x_lag.reshape(-1, 1)
+        k = 1
+        y_r, x_r = y, x_lag
     else:
         raise ValueError(f"Unknown regression type: {regression}")
 
-    # OLS regression
-    beta = np.linalg.lstsq(X, y, rcond=None)[0]
-    residuals = y - X @ beta
-    se = np.sqrt(np.sum(residuals ** 2) / (n - 1 - X.shape[1]))
+    # OLS coefficient on x_lag (closed-form normal equations after
+    # partialling out)
+    sxx = np.einsum('ij,ij->j', x_r, x_r)
+    rho_coef = np.einsum('ij,ij->j', x_r, y_r) / sxx
+    residuals = y_r - rho_coef * x_r
+    sigma2 = np.einsum('ij,ij->j', residuals, residuals) / (n - 1 - k)
 
-    # Test statistic for coefficient on x_lag
-    rho_coef = beta[-1]
-    # SE calculation (simplified)
-    X_var = np.var(x_lag)
-    se_rho = se / np.sqrt(n * X_var)
-    t_stat = rho_coef / se_rho
+    # Test statistic for coefficient on x_lag; sigma2 / sxx is its entry of
+    # sigma2 * (X'X)^-1
+    se_rho = np.sqrt(sigma2 / sxx)
+    t_stats = rho_coef / se_rho
 
     # Approximate critical values (from MacKinnon 1994)
     critical_values = {"1%": -3.43, "5%": -2.86, "10%": -2.57}
 
-    # Very rough p-value approximation
-    if t_stat < critical_values["1%"]:
-        p_value = 0.001
-    elif t_stat < critical_values["5%"]:
-        p_value = 0.03
-    elif t_stat < critical_values["10%"]:
-        p_value = 0.08
-    else:
-        p_value = 0.15
-
-    return {
-        "test_statistic": t_stat,
-        "p_value": p_value,
-        "n_lags": 0,
-        "n_obs": n - 1,
-        "critical_values": critical_values,
-        "stationary": p_value < 0.05,
-    }
+    results = []
+    for t_stat in t_stats:
+        # Very rough p-value approximation
+        if t_stat < critical_values["1%"]:
+            p_value = 0.001
+        elif t_stat < critical_values["5%"]:
+            p_value = 0.03
+        elif t_stat < critical_values["10%"]:
+            p_value = 0.08
+        else:
+            p_value = 0.15
+
+        results.append({
+            "test_statistic": t_stat,
+            "p_value": p_value,
+            "n_lags": 0,
+            "n_obs": n - 1,
+            "critical_values": dict(critical_values),
+            "stationary": p_value < 0.05,
+        })
+
+    return results
 
 
 def ljung_box_test(
@@ -260,11 +331,11 @@ def ljung_box_test(
         H1: Autocorrelation present
         Reject H0 if p-value < 0.05
     """
-    if isinstance(residuals, pd.Series):
-        residuals = residuals.values
+    residuals = _as_float64_contig(residuals)
 
     n = len(residuals)
-    acf_vals = compute_acf(residuals, nlags=lags)[1:]  # Exclude lag 0
+    # Only lags 1..K are needed, so let compute_acf skip the FFT when K is small
+    acf_vals = compute_acf(residuals, nlags=lags, fft="auto")[1:]  # Exclude lag 0
 
     # Ljung-Box statistic
     Q = n * (n + 2) * np.sum(acf_vals ** 2 / (n - np.arange(1, lags + 1)))
@@ -297,7 +368,8 @@ def compute_vif(X: pd.DataFrame, exclude_cols: Optional[List[str]] = None) -> pd
 
     Note:
         VIF_j = 1 / (1 - R²_j)
-        where R²_j is from regressing X_j on all other X variables
+        where R²_j is from regressing X_j on all other X variables (with an
+        intercept); equivalently the diagonal of the inverse correlation matrix
         Rule of thumb: VIF > 10 indicates problematic multicollinearity
     """
     if exclude_cols is None:
@@ -309,38 +381,61 @@ def compute_vif(X: pd.DataFrame, exclude_cols: Optional[List[str]] = None) -> pd
         if col in X.columns:
             X = X.drop(columns=col)
 
-    vif_data = {}
+    # VIF_j is the j-th diagonal element of the inverse correlation matrix,
+    # so one p x p inverse gives every VIF (each auxiliary regression
+    # includes an intercept). Constant columns carry no variation to
+    # inflate and get VIF 1.
+    values = X.to_numpy(dtype=np.float64)
+    std = values.std(axis=0)
+    varying = std > 0
 
-    for col in X.columns:
-        # Regress X[col] on all other columns
-        y = X[col]
-        X_others = X.drop(columns=col)
+    vif = np.ones(X.shape[1])
+    if varying.sum() > 1:
+        Z = (values[:, varying] - values[:, varying].mean(axis=0)) / std[varying]
+        corr = (Z.T @ Z) / len(Z)
 
-        if X_others.shape[1] == 0:
-            # No other variables
-            vif_data[col] = 1.0
-            continue
+        # Eigendecomposition so exact collinearity is handled per column:
+        # columns involved in it get inf, the rest the pseudo-inverse diagonal
+        eigvals, eigvecs = np.linalg.eigh(corr)
+        nonsingular = eigvals > eigvals.max() * len(eigvals) * np.finfo(float).eps
+        inv_diag = (eigvecs[:, nonsingular] ** 2 / eigvals[nonsingular]).sum(axis=1)
+        collinear = (eigvecs[:, ~nonsingular] ** 2).sum(axis=1) > np.sqrt(np.finfo(float).eps)
+        vif[varying] = np.where(collinear, np.inf, inv_diag)
 
-        # OLS regression
-        try:
-            beta = np.linalg.lstsq(X_others.values, y.values, rcond=None)[0]
-            y_pred = X_others.values @ beta
-            ss_res = np.sum((y.values - y_pred) ** 2)
-            ss_tot = np.sum((y.values - y.mean()) ** 2)
-            r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
+    return pd.Series(vif, index=X.columns)
 
-            # VIF
-            if r_squared >= 1.0:
-                vif = np.inf
-            else:
-                vif = 1.0 / (1.0 - r_squared)
 
-            vif_data[col] = vif
+def _hat_stats(X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Hat-matrix statistics from one QR of X, shared by the influence measures.
+
+    The n x n hat matrix is never formed: with X = QR, H = QQ' so its
+    diagonal is the row-wise squared norm of Q. Memory is O(np). Rank-
+    deficient designs, including wide ones with n < p, fall back to a thin
+    SVD (pseudo-inverse leverage).
 
-        except np.linalg.LinAlgError:
-            vif_data[col] = np.inf
+    Returns:
+        Tuple of (Q, leverage, (X'X)^-1)
+    """
+    Q, R = np.linalg.qr(X, mode='reduced')
+    r_diag = np.abs(np.diag(R))
+    tol = r_diag.max(initial=0.0) * max(X.shape) * np.finfo(float).eps
+
+    # R is only square (and invertible when its diagonal is nonzero) for n >= p
+    if X.shape[0] >= X.shape[1] and r_diag.size and r_diag.min() > tol:
+        leverage = np.einsum('ij,ij->i', Q, Q)
+        R_inv = scipy.linalg.solve_triangular(R, np.eye(R.shape[1]))
+        XtX_inv = R_inv @ R_inv.T
+    else:
+        # Rank-deficient X: QR's Q may span more than col(X), so project onto
+        # the leading singular vectors instead (pseudo-inverse leverage)
+        U, sv, Vt = np.linalg.svd(X, full_matrices=False)
+        keep = sv > sv.max(initial=0.0) * max(X.shape) * np.finfo(float).eps
+        Q = U[:, keep]
+        leverage = np.einsum('ij,ij->i', Q, Q)
+        XtX_inv = (Vt[keep].T / sv[keep] ** 2) @ Vt[keep]
 
-    return pd.Series(vif_data)
+    return Q, leverage, XtX_inv
 
 
 def compute_cooks_d(
@@ -367,13 +462,7 @@ def compute_cooks_d(
     n, p = X.shape
 
     # Hat matrix diagonal (leverage)
-    try:
-        H = X @ np.linalg.inv(X.T @ X) @ X.T
-        leverage = np.diag(H)
-    except np.linalg.LinAlgError:
-        # Singular matrix, use pseudo-inverse
-        H = X @ np.linalg.pinv(X.T @ X) @ X.T
-        leverage = np.diag(H)
+    _, leverage, _ = _hat_stats(X)
 
     # MSE (mean squared error)
     mse = np.sum(residuals ** 2) / (n - p)
@@ -387,7 +476,8 @@ def compute_cooks_d(
 def compute_dfbetas(
     X: np.ndarray,
     residuals: np.ndarray,
-    var_covar_matrix: np.ndarray
+    var_covar_matrix: np.ndarray,
+    order: str = "C"
 ) -> np.ndarray:
     """
     Compute DFBETAS for each observation and coefficient.
@@ -395,39 +485,47 @@ def compute_dfbetas(
     Args:
         X: Design matrix (n x p)
         residuals: OLS residuals (n,)
-        var_covar_matrix: Variance-covariance matrix of coefficients (p x p)
+        var_covar_matrix: OLS variance-covariance matrix of coefficients,
+            s^2 (X'X)^-1 (p x p)
+        order: Memory layout of the result; 'F' keeps each coefficient's
+            column contiguous for per-coefficient scans such as
+            (np.abs(dfbetas) > 2 / np.sqrt(n)).any(axis=0)
 
     Returns:
         Array of DFBETAS (n x p)
 
     Note:
-        DFBETAS_ji = (β_j - β_j(-i)) / SE(β_j)
+        DFBETAS_ji = (β_j - β_j(-i)) / (s_(i) sqrt([(X'X)^-1]_jj))
+        where s_(i) is the residual standard error with observation i
+        deleted, as in statsmodels' OLSInfluence.dfbetas
         Measures change in coefficient j when observation i is deleted
         Rule of thumb: |DFBETAS| > 2/sqrt(n) indicates influential observation
     """
     n, p = X.shape
 
-    # Hat matrix
-    try:
-        H = X @ np.linalg.inv(X.T @ X) @ X.T
-    except np.linalg.LinAlgError:
-        H = X @ np.linalg.pinv(X.T @ X) @ X.T
-
-    leverage = np.diag(H)
-
-    # DFBETAS matrix (n x p)
-    dfbetas = np.zeros((n, p))
+    # Hat matrix diagonal (leverage) and (X'X)^-1 from one factorization
+    _, leverage, XtX_inv = _hat_stats(X)
 
     # Standard errors
     se = np.sqrt(np.diag(var_covar_matrix))
 
-    for i in range(n):
-        # Studentized residual
-        stud_res = residuals[i] / np.sqrt(1 - leverage[i]) if leverage[i] < 1 else 0
+    # Deleting observation i shifts the coefficients by
+    # (X'X)^-1 x_i e_i / (1 - h_ii); observations with h_ii = 1 are set to 0
+    fit = leverage < 1
+    scaled_res = np.divide(residuals, 1 - leverage, out=np.zeros(n), where=fit)
 
-        # DFBETAS for observation i
-        for j in range(p):
-            dfbetas[i, j] = (stud_res * np.sqrt(var_covar_matrix[j, j]) * X[i, j]) / se[j]
+    # Leave-one-out residual variance s_(i)^2, relative to the full-sample s^2
+    # that var_covar_matrix is scaled by
+    ssr = residuals @ residuals
+    ssr_deleted = ssr - residuals * scaled_res
+    scale = np.divide(ssr / (n - p), ssr_deleted / (n - p - 1),
+                      out=np.zeros(n), where=fit & (ssr_deleted > 0))
+    scaled_res *= np.sqrt(scale)
+
+    # DFBETAS matrix (n x p): one matmul and one broadcast
+    dfbetas = np.empty(X.shape, order=order)
+    np.multiply(X @ XtX_inv, scaled_res[:, None], out=dfbetas)
+    dfbetas /= se[None, :]
 
     return dfbetas
 
@@ -446,12 +544,9 @@ def compute_leverage(X: np.ndarray) -> np.ndarray:
         h_i = X_i' (X'X)^-1 X_i (diagonal of hat matrix)
         Rule of thumb: h_i > 2p/n or 3p/n indicates high leverage
     """
-    try:
-        H = X @ np.linalg.inv(X.T @ X) @ X.T
-    except np.linalg.LinAlgError:
-        H = X @ np.linalg.pinv(X.T @ X) @ X.T
+    _, leverage, _ = _hat_stats(X)
 
-    return np.diag(H)
+    return leverage
 
 
 # ============================================================================
@@ -472,13 +567,20 @@ def detect_outliers_iqr(
     Returns:
         Dict with outlier indices, bounds, and counts
     """
-    if isinstance(x, pd.Series):
-        x_vals = x.values
-    else:
-        x_vals = x
+    x_vals = _as_float64_contig(x)
 
-    q1 = np.percentile(x_vals, 25)
-    q3 = np.percentile(x_vals, 75)
+    if np.isnan(x_vals).any():
+        # np.partition sorts NaN last, which would give finite but wrong
+        # quartiles; keep np.percentile's NaN result instead
+        q1 = q3 = np.nan
+    else:
+        # Both quartiles from one partial sort: partition around the order
+        # statistics bracketing each, then interpolate linearly as np.percentile
+        positions = np.array([0.25, 0.75]) * (len(x_vals) - 1)
+        lower = np.floor(positions).astype(int)
+        upper = np.minimum(lower + 1, len(x_vals) - 1)
+        part = np.partition(x_vals, np.unique(np.concatenate([lower, upper])))
+        q1, q3 = part[lower] + (positions - lower) * (part[upper] - part[lower])
     iqr = q3 - q1
 
     lower_bound = q1 - multiplier * iqr
@@ -512,13 +614,10 @@ def detect_outliers_zscore(
     Returns:
         Dict with outlier indices, z-scores, and counts
     """
-    if isinstance(x, pd.Series):
-        x_vals = x.values
-    else:
-        x_vals = x
+    x_vals = _as_float64_contig(x)
 
-    mean = np.mean(x_vals)
-    std = np.std(x_vals)
+    mean = np.nanmean(x_vals, dtype=np.float64)
+    std = np.nanstd(x_vals, dtype=np.float64)
 
     z_scores = np.abs((x_vals - mean) / std) if std > 0 else np.zeros_like(x_vals)
 
@@ -555,36 +654,33 @@ def analyze_null_patterns(
     Returns:
         DataFrame with NULL counts and patterns by regime
     """
-    null_summary = []
-
-    for col in df.columns:
-        if col == date_col:
-            continue
-
-        null_count = df[col].isna().sum()
-        null_pct = null_count / len(df)
-
-        row = {
-            "variable": col,
-            "null_count": null_count,
-            "null_pct": null_pct,
-        }
-
-        # Regime-specific NULL patterns
-        if regime_cols:
-            for regime_col in regime_cols:
-                if regime_col in df.columns:
-                    regime_data = df[df[regime_col]]
-                    regime_nulls = regime_data[col].isna().sum()
-                    regime_total = len(regime_data)
-                    regime_null_pct = regime_nulls / regime_total if regime_total > 0 else 0
-
-                    row[f"{regime_col}_null_count"] = regime_nulls
-                    row[f"{regime_col}_null_pct"] = regime_null_pct
-
-        null_summary.append(row)
+    # One isna() pass over every column into a boolean matrix; the regime
+    # breakdowns reuse it with one masked column sum each
+    na = df.drop(columns=date_col, errors="ignore").isna()
+    na_matrix = na.to_numpy()
+    null_count = na_matrix.sum(axis=0)
+
+    summary = {
+        "variable": na.columns,
+        "null_count": null_count,
+        "null_pct": null_count / len(df),
+    }
 
-    return pd.DataFrame(null_summary)
+    # Regime-specific NULL patterns
+    if regime_cols:
+        for regime_col in regime_cols:
+            if regime_col in df.columns:
+                mask = df[regime_col].to_numpy(dtype=bool)
+                regime_nulls = na_matrix[mask].sum(axis=0)
+                regime_total = mask.sum()
+
+                summary[f"{regime_col}_null_count"] = regime_nulls
+                summary[f"{regime_col}_null_pct"] = (
+                    regime_nulls / regime_total if regime_total > 0
+                    else np.zeros_like(regime_nulls)
+                )
+
+    return pd.DataFrame(summary)
 
 
 def check_structural_nulls(
@@ -21,10 +21,16 @@ Failure Action:
     PI must sign off on remediation.
 """
 
+import os
 import re
 import ast
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from fnmatch import fnmatch
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import List, Dict, Set, Tuple, Optional
+from typing import FrozenSet, Iterator, List, Dict, Set, Tuple, Optional
 import warnings
 
 
@@ -36,6 +42,57 @@ DEFAULT_MEDIATOR_VARS = [
     "P_t",  # Generic posting variable
 ]
 
+# Formula parsing patterns, compiled once at import
+_SPLIT_RHS = re.compile(r'[+\-*/()\s,|:]+')
+_SPLIT_TERMS = re.compile(r'[+\s]+')
+_SPLIT_VARS = re.compile(r'[+\-*/()\[\]\s,|:^]+')
+_FUNC_STRIP = re.compile(r'\b(log|exp|sqrt|I|poly|bs|ns|C)\s*\(')
+_VAR_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
+_NEWLINE = re.compile(r'\n')
+
+# Files at least this large are scanned in worker processes: their regex
+# work holds the GIL, while smaller files are dominated by I/O and process
+# start-up would cost more than it saves
+_PROCESS_SCAN_MIN_BYTES = 64 * 1024
+
+# Directory names skipped by scan_codebase unless exclude_patterns is given
+_EXCLUDE_NAMES = frozenset({"tests", "venv", ".venv", "env", ".git", "__pycache__"})
+
+# Model-call patterns searched by the file scanners
+_PY_FORMULA_PATTERNS = (
+    re.compile(r'formula\s*=\s*["\']([^"\']+)["\']'),
+    re.compile(r'smf\.ols\s*\(\s*["\']([^"\']+)["\']'),
+    re.compile(r'sm\.OLS\s*\('),  # May need more sophisticated parsing
+)
+_R_FORMULA_PATTERNS = (
+    re.compile(r'lm\s*\(\s*([^,]+)\s*,'),
+    re.compile(r'glm\s*\(\s*([^,]+)\s*,'),
+    re.compile(r'lmer\s*\(\s*([^,]+)\s*,'),
+    re.compile(r'plm\s*\(\s*([^,]+)\s*,'),
+    re.compile(r'feols\s*\(\s*([^,]+)\s*,'),
+    re.compile(r'bsts\s*\(\s*([^,]+)\s*,'),
+    re.compile(r'CausalImpact\s*\('),
+)
+
+
+@lru_cache(maxsize=None)
+def _mediator_regex(mediator_vars: Tuple[str, ...], case_sensitive: bool) -> re.Pattern:
+    """Single alternation matching any of the mediators as a substring."""
+    flags = 0 if case_sensitive else re.IGNORECASE
+    return re.compile("|".join(map(re.escape, mediator_vars)), flags)
+
+
+def _mediator_hits(
+    text: str,
+    mediator_vars: Tuple[str, ...],
+    case_sensitive: bool
+) -> Set[int]:
+    """Indices of the mediators occurring as substrings of ``text``."""
+    if not case_sensitive:
+        text = text.lower()
+        mediator_vars = tuple(m.lower() for m in mediator_vars)
+    return {i for i, mediator in enumerate(mediator_vars) if mediator in text}
+
 
 # ============================================================================
 # Formula String Parsing
@@ -72,31 +129,33 @@ def check_formula_for_leakage(
     _, rhs = formula.split("~", 1)
     rhs = rhs.strip()
 
+    # One pass over the RHS rules out clean formulas (the common case).
+    # Mediator names contain no operator characters, so any hit lies
+    # within a single token.
+    if not _mediator_regex(tuple(mediator_vars), case_sensitive).search(rhs):
+        return []
+
     # Parse variables from RHS
     # Split on operators and parentheses
-    tokens = re.split(r'[+\-*/()\s,|:]+', rhs)
+    tokens = _SPLIT_RHS.split(rhs)
     variables = {t.strip() for t in tokens if t.strip() and not t.strip().isdigit()}
 
-    # Check for mediators
+    # Check for mediators: one scan per variable, then report the first
+    # variable containing each mediator
+    mediators = tuple(mediator_vars)
+    hits = {var: _mediator_hits(var, mediators, case_sensitive) for var in variables}
+
     detected = []
-    for mediator in mediator_vars:
-        if case_sensitive:
+    for i, mediator in enumerate(mediators):
+        if case_sensitive and mediator in variables:
             # Exact match
-            if mediator in variables:
-                detected.append(mediator)
-            else:
-                # Check for partial matches (e.g., log(P_calldata_gas))
-                for var in variables:
-                    if mediator in var:
-                        detected.append(var)
-                        break
-        else:
-            # Case-insensitive match
-            mediator_lower = mediator.lower()
-            for var in variables:
-                if mediator_lower in var.lower():
-                    detected.append(var)
-                    break
+            detected.append(mediator)
+            continue
+        # Partial matches (e.g., log(P_calldata_gas))
+        for var in variables:
+            if i in hits[var]:
+                detected.append(var)
+                break
 
     return detected
 
@@ -124,10 +183,10 @@ def parse_r_formula(formula: str) -> Dict[str, List[str]]:
     # Check for instruments (indicated by |)
     if "|" in rhs:
         predictors_str, instruments_str = rhs.split("|", 1)
-        predictors = [p.strip() for p in re.split(r'[+\s]+', predictors_str.strip()) if p.strip()]
-        instruments = [i.strip() for i in re.split(r'[+\s]+', instruments_str.strip()) if i.strip()]
+        predictors = [p.strip() for p in _SPLIT_TERMS.split(predictors_str.strip()) if p.strip()]
+        instruments = [i.strip() for i in _SPLIT_TERMS.split(instruments_str.strip()) if i.strip()]
     else:
-        predictors = [p.strip() for p in re.split(r'[+\s]+', rhs) if p.strip()]
+        predictors = [p.strip() for p in _SPLIT_TERMS.split(rhs) if p.strip()]
         instruments = []
 
     return {
@@ -158,17 +217,17 @@ def extract_variables_from_formula(formula: str) -> Set[str]:
 
     # Remove function calls but keep arguments
     # E.g., log(x) -> x, I(x^2) -> x
-    rhs = re.sub(r'\b(log|exp|sqrt|I|poly|bs|ns|C)\s*\(', '(', rhs)
+    rhs = _FUNC_STRIP.sub('(', rhs)
 
     # Split on operators
-    tokens = re.split(r'[+\-*/()\[\]\s,|:^]+', rhs)
+    tokens = _SPLIT_VARS.split(rhs)
 
     # Filter to valid variable names
     variables = set()
     for token in tokens:
         token = token.strip()
         # Valid variable: starts with letter or underscore, contains alphanumeric or underscore
-        if token and re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', token):
+        if token and _VAR_RE.match(token):
             variables.add(token)
 
     return variables
@@ -204,18 +263,11 @@ def check_design_matrix_columns(
     if mediator_vars is None:
         mediator_vars = DEFAULT_MEDIATOR_VARS
 
-    detected = []
-
-    for col in column_names:
-        for mediator in mediator_vars:
-            if case_sensitive:
-                if mediator in col:
-                    detected.append(col)
-                    break
-            else:
-                if mediator.lower() in col.lower():
-                    detected.append(col)
-                    break
+    mediators = tuple(mediator_vars)
+    detected = [
+        col for col in column_names
+        if _mediator_hits(col, mediators, case_sensitive)
+    ]
 
     return detected
 
@@ -251,19 +303,18 @@ def scan_python_file(
     violations = []
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = _read_if_mentioned(file_path, mediator_vars)
+        if content is None:
+            return violations
+
+        # Sorted newline offsets: a match's line number is found by
+        # bisection rather than by counting newlines in the prefix
+        newlines = [m.start() for m in _NEWLINE.finditer(content)]
 
         # Look for formula strings
         # Pattern 1: formula="..." or formula='...'
-        formula_patterns = [
-            r'formula\s*=\s*["\']([^"\']+)["\']',
-            r'smf\.ols\s*\(\s*["\']([^"\']+)["\']',
-            r'sm\.OLS\s*\(',  # May need more sophisticated parsing
-        ]
-
-        for pattern in formula_patterns:
-            matches = re.finditer(pattern, content)
+        for pattern in _PY_FORMULA_PATTERNS:
+            matches = pattern.finditer(content)
             for match in matches:
                 if match.groups():
                     formula = match.group(1)
@@ -271,7 +322,7 @@ def scan_python_file(
 
                     if detected:
                         # Find line number
-                        line_num = content[:match.start()].count('\n') + 1
+                        line_num = bisect_left(newlines, match.start()) + 1
 
                         violations.append({
                             "file": str(file_path),
@@ -313,30 +364,25 @@ def scan_r_file(
     violations = []
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = _read_if_mentioned(file_path, mediator_vars)
+        if content is None:
+            return violations
+
+        # Sorted newline offsets: a match's line number is found by
+        # bisection rather than by counting newlines in the prefix
+        newlines = [m.start() for m in _NEWLINE.finditer(content)]
 
         # Look for R formula patterns
         # Pattern: function(formula, ...)
-        r_patterns = [
-            r'lm\s*\(\s*([^,]+)\s*,',
-            r'glm\s*\(\s*([^,]+)\s*,',
-            r'lmer\s*\(\s*([^,]+)\s*,',
-            r'plm\s*\(\s*([^,]+)\s*,',
-            r'feols\s*\(\s*([^,]+)\s*,',
-            r'bsts\s*\(\s*([^,]+)\s*,',
-            r'CausalImpact\s*\(',
-        ]
-
-        for pattern in r_patterns:
-            matches = re.finditer(pattern, content)
+        for pattern in _R_FORMULA_PATTERNS:
+            matches = pattern.finditer(content)
             for match in matches:
                 if match.groups():
                     formula = match.group(1).strip()
                     detected = check_formula_for_leakage(formula, mediator_vars)
 
                     if detected:
-                        line_num = content[:match.start()].count('\n') + 1
+                        line_num = bisect_left(newlines, match.start()) + 1
 
                         violations.append({
                             "file": str(file_path),
@@ -365,6 +411,10 @@ def scan_yaml_file(
 
     Returns:
         List of violations found
+
+    Note:
+        Parses with libyaml's C loader when PyYAML was built with it (same
+        safe_load semantics, much faster), else the pure-Python SafeLoader.
     """
     if mediator_vars is None:
         mediator_vars = DEFAULT_MEDIATOR_VARS
@@ -374,8 +424,9 @@ def scan_yaml_file(
     try:
         import yaml
 
+        loader_cls = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
         with open(file_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=loader_cls)
 
         # Recursively search for formula strings
         def search_dict(d, path=""):
@@ -411,11 +462,77 @@ def scan_yaml_file(
     return violations
 
 
+def _scan_file(file_path: Path, mediator_vars: List[str]) -> List[Dict[str, any]]:
+    """Scan one file with the scanner for its type (no-op for other types)."""
+    if file_path.suffix == ".py":
+        return scan_python_file(file_path, mediator_vars)
+    elif file_path.suffix == ".R":
+        return scan_r_file(file_path, mediator_vars)
+    elif file_path.suffix in [".yaml", ".yml"]:
+        return scan_yaml_file(file_path, mediator_vars)
+    return []
+
+
+def _file_size(file_path: Path) -> int:
+    """Size of ``file_path`` in bytes (0 if it cannot be stat'ed)."""
+    try:
+        return file_path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _read_if_mentioned(file_path: Path, mediator_vars: List[str]) -> Optional[str]:
+    """
+    Text of ``file_path``, or None if it cannot contain a leaking formula.
+
+    A violation needs a ``~`` and (case-insensitively) a mediator name in
+    the file, which plain ``bytes`` substring tests rule out far faster
+    than the formula regexes; only files passing them are decoded.
+    """
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+
+    if b'~' not in raw:
+        return None
+    lowered = raw.lower()
+    if not any(m.lower().encode('utf-8') in lowered for m in mediator_vars):
+        return None
+
+    # Same newline translation as reading in text mode
+    return raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _walk_files(root: Path, exclude_names: FrozenSet[str]) -> Iterator[Path]:
+    """
+    Files under ``root`` in ``Path.rglob`` order, pruning excluded directories.
+
+    A directory whose name is in ``exclude_names`` is not descended into, which
+    saves the readdir/stat calls of, e.g., a large virtualenv.
+    """
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return
+
+    subdirs = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            subdirs.append(entry)
+        elif entry.is_file():
+            yield Path(entry.path)
+
+    for entry in subdirs:
+        if entry.name in exclude_names:
+            continue
+        yield from _walk_files(Path(entry.path), exclude_names)
+
+
 def scan_codebase(
     project_root: Path,
     mediator_vars: Optional[List[str]] = None,
     include_patterns: Optional[List[str]] = None,
-    exclude_patterns: Optional[List[str]] = None
+    exclude_patterns: Optional[List[str]] = None,
+    max_workers: Optional[int] = None
 ) -> Dict[str, any]:
     """
     Scan entire codebase for leakage violations.
@@ -423,8 +540,11 @@ def scan_codebase(
     Args:
         project_root: Path to project root directory
         mediator_vars: List of mediator variables to check
-        include_patterns: File patterns to include (default: *.py, *.R, *.yaml)
-        exclude_patterns: Directory patterns to exclude (default: tests/, venv/, .git/)
+        include_patterns: File name patterns to include (default: *.py, *.R, *.yaml)
+        exclude_patterns: Directory names to exclude, matched against whole path
+            components below ``project_root``; a trailing "/" is ignored
+            (default: tests/, venv/, .git/)
+        max_workers: Workers per pool used to scan files (executor defaults if None)
 
     Returns:
         Dict with scan results and violations
@@ -441,34 +561,40 @@ def scan_codebase(
         include_patterns = ["*.py", "*.R", "*.yaml", "*.yml"]
 
     if exclude_patterns is None:
-        exclude_patterns = ["tests/", "venv/", ".venv/", "env/", ".git/", "__pycache__/"]
+        exclude_names = _EXCLUDE_NAMES
+    else:
+        exclude_names = frozenset(excl.rstrip("/") for excl in exclude_patterns)
 
-    all_violations = []
-    scanned_files = []
+    # One walk of the tree that prunes excluded directories by name, then the
+    # files matching each pattern
+    candidates = list(_walk_files(project_root, exclude_names))
 
+    scanned_files = []
     for pattern in include_patterns:
-        for file_path in project_root.rglob(pattern):
-            # Check exclusions
-            if any(excl in str(file_path) for excl in exclude_patterns):
-                continue
-
-            scanned_files.append(file_path)
-
-            # Scan based on file type
-            if file_path.suffix == ".py":
-                violations = scan_python_file(file_path, mediator_vars)
-            elif file_path.suffix == ".R":
-                violations = scan_r_file(file_path, mediator_vars)
-            elif file_path.suffix in [".yaml", ".yml"]:
-                violations = scan_yaml_file(file_path, mediator_vars)
-            else:
-                continue
-
-            all_violations.extend(violations)
+        scanned_files.extend(f for f in candidates if fnmatch(f.name, pattern))
+
+    # Files are independent: large ones go to a process pool (CPU-bound
+    # regex work), the rest to a thread pool whose reads release the GIL.
+    # Results are slotted back by index to keep the file order of the report
+    scan = partial(_scan_file, mediator_vars=mediator_vars)
+    large = [i for i, path in enumerate(scanned_files) if _file_size(path) >= _PROCESS_SCAN_MIN_BYTES]
+    large_set = set(large)
+    small = [i for i in range(len(scanned_files)) if i not in large_set]
+
+    per_file = [None] * len(scanned_files)
+    with ProcessPoolExecutor(max_workers=max_workers) as processes, \
+            ThreadPoolExecutor(max_workers=max_workers) as threads:
+        large_results = processes.map(scan, [scanned_files[i] for i in large])
+        small_results = threads.map(scan, [scanned_files[i] for i in small])
+        for i, violations in zip(small, small_results):
+            per_file[i] = violations
+        for i, violations in zip(large, large_results):
+            per_file[i] = violations
+    all_violations = [v for violations in per_file for v in violations]
 
     # Generate report
     report = {
-        "timestamp": pd.Timestamp.now().isoformat(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
         "project_root": str(project_root),
         "mediator_vars": mediator_vars,
         "scanned_files": len(scanned_files),
@@ -539,7 +665,3 @@ def generate_leakage_report_markdown(report: Dict[str, any]) -> str:
         ])
 
     return "\n".join(lines)
-
-
-# Import for timestamps
-import pandas as pd
@@ -12,20 +12,31 @@ Date: 2025-01-10
 """
 
 import os
+import io
 import re
 import ast
 import json
+import mmap
+import tokenize
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+from dataclasses import dataclass, fields
 from datetime import datetime
+from functools import lru_cache
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 # Define mediator variables that MUST be excluded
-MEDIATORS = {
+MEDIATORS = frozenset({
     'P_calldata_gas', 'P_blob_gas', 'P_calldata', 'P_blob',
     'p_calldata', 'p_blob', 'calldata_gas_price', 'blob_gas_price',
     'calldata_price', 'blob_price', 'posting_gas', 'posting_price',
     'P_t', 'p_t'  # Generic posting price notation
-}
+})
 
 # Additional patterns that might indicate mediator usage
 MEDIATOR_PATTERNS = [
@@ -35,6 +46,58 @@ MEDIATOR_PATTERNS = [
     r'[Pp]_t(?:\s|,|\)|$)'  # P_t or p_t as variable
 ]
 
+# All patterns fused into one alternation, each wrapped in a lookahead so a
+# match never consumes text another pattern could start in. No two patterns
+# can match at the same offset, so every pattern matching a line shows up
+# as the lastgroup of some match.
+_MEDIATOR_PATTERNS_FUSED = re.compile(
+    "|".join(f"(?=(?P<g{i}>{p}))" for i, p in enumerate(MEDIATOR_PATTERNS)),
+    re.IGNORECASE
+)
+
+# Mediator names as one case-insensitive alternation, used to find the
+# lines worth analysing. Every pattern match above contains one of the
+# names, so no separate pattern pass is needed for that
+_MEDIATOR_NAMES_FUSED = re.compile(
+    "|".join(map(re.escape, sorted({m.lower() for m in MEDIATORS}))), re.IGNORECASE
+)
+
+# Mediator names are made of word characters only, so any occurrence lies
+# inside one run of them; such runs repeat heavily across a codebase
+_TOKEN_RE = re.compile(r'[A-Za-z0-9_]+')
+_NON_NEWLINE = re.compile(r'[^\n]')
+
+# Every mediator name and pattern contains one of these (case-insensitively),
+# so files without any of them are skipped before decoding or parsing. A
+# bytes regex runs directly on the file buffer without a lowercased copy
+_LITERAL_TOKENS = (b'calldata', b'blob', b'posting', b'p_t')
+_LITERAL_PREFILTER = re.compile(b'|'.join(_LITERAL_TOKENS), re.IGNORECASE)
+
+# Directories that never hold scannable sources; the walk does not enter them
+_PRUNED_DIRS = frozenset({'.git', '__pycache__'})
+
+# Files at least this large are memory-mapped for the prefilter rather
+# than read, so skipped files are never copied into a bytes object
+_MMAP_MIN_BYTES = 64 * 1024
+
+# Call methods whose mediator arguments are flagged by the AST scan
+_MODEL_METHODS = frozenset({'fit', 'predict', 'transform'})
+
+# Lines matching this are critical even without a forbidden keyword
+_HIGH_RISK_RE = re.compile(
+    "|".join([
+        r'X_vars.*=',
+        r'predictors.*=',
+        r'\.fit\(',
+        r'LinearRegression',
+        r'OLS\(',
+        r'panel.*model',
+        r'correlation.*matrix'
+    ]),
+    re.IGNORECASE
+)
+_MEDIUM_RISK_RE = re.compile('model|regression|analysis', re.IGNORECASE)
+
 # Contexts where mediators should NOT appear
 FORBIDDEN_CONTEXTS = [
     'corr', 'correlation', 'regression', 'model', 'X_vars', 'x_vars',
@@ -51,6 +114,226 @@ SAFE_CONTEXTS = [
 ]
 
 
+@lru_cache(maxsize=4096)
+def _mediators_in_token(token: str) -> FrozenSet[str]:
+    """Mediators occurring (case-insensitively) as substrings of ``token``."""
+    lowered = token.lower()
+    return frozenset(m for m in MEDIATORS if m.lower() in lowered)
+
+
+def _context_regex(terms: List[str]) -> re.Pattern:
+    """
+    Case-insensitive lookahead alternation over ``terms``, group i + 1 being
+    term i.
+
+    Contexts used to be found by testing each term against the lowercased
+    line, so terms with capitals (e.g. 'TODO', 'OLS') never matched; they
+    are left out to keep that behaviour.
+    """
+    return re.compile(
+        "|".join(f"(?=({re.escape(t)}))" if t == t.lower() else "(?!)()" for t in terms),
+        re.IGNORECASE
+    )
+
+
+_SAFE_RE = _context_regex(SAFE_CONTEXTS)
+_FORBIDDEN_RE = _context_regex(FORBIDDEN_CONTEXTS)
+
+
+def _first_context(regex: re.Pattern, terms: List[str], line: str) -> Optional[str]:
+    """Earliest-listed term of ``terms`` occurring in ``line`` (None if none)."""
+    first = min((m.lastindex for m in regex.finditer(line)), default=None)
+    return None if first is None else terms[first - 1]
+
+
+def _load_json(raw: bytes):
+    """Parse JSON bytes with orjson when installed, else the stdlib parser."""
+    if HAS_ORJSON:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjson is strict (e.g. rejects NaN); let json decide
+            pass
+    return json.loads(raw)
+
+
+def _iter_files(directory: Path, suffix: str) -> Iterator[Path]:
+    """Files under ``directory`` ending in ``suffix``, in ``Path.rglob`` order."""
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+
+    subdirs = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name not in _PRUNED_DIRS:
+                subdirs.append(entry)
+        elif entry.name.endswith(suffix) and entry.is_file():
+            yield Path(entry.path)
+
+    for entry in subdirs:
+        yield from _iter_files(Path(entry.path), suffix)
+
+
+def _read_source(filepath: Path) -> Optional[str]:
+    """
+    Text of ``filepath``, or None if it cannot mention a mediator.
+
+    Decodes with the universal-newline translation of text mode, and only
+    after the literal prefilter has passed.
+    """
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size >= _MMAP_MIN_BYTES:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if not _LITERAL_PREFILTER.search(mm):
+                    return None
+                raw = mm[:]
+        else:
+            raw = f.read()
+            if not _LITERAL_PREFILTER.search(raw):
+                return None
+
+    return raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _mediator_hit_starts(content: str) -> Set[int]:
+    """
+    Offsets in ``content`` where a mediator name (case-insensitively) starts.
+
+    One pass of the fused name regex; every line with a hit contributes
+    at least one offset.
+    """
+    return {m.start() for m in _MEDIATOR_NAMES_FUSED.finditer(content)}
+
+
+def _line_hits(code: str) -> Tuple[Set[str], List[str]]:
+    """Mediators and MEDIATOR_PATTERNS (in list order) occurring in ``code``."""
+    mediators_found = set()
+    for token in _TOKEN_RE.findall(code):
+        mediators_found |= _mediators_in_token(token)
+
+    groups = {match.lastgroup for match in _MEDIATOR_PATTERNS_FUSED.finditer(code)}
+    patterns_found = [p for i, p in enumerate(MEDIATOR_PATTERNS) if f"g{i}" in groups]
+    return mediators_found, patterns_found
+
+
+def _candidate_lines(content: str) -> List[Tuple[int, int, int]]:
+    """
+    (line number, start, end) spans of the lines of ``content`` with a
+    mediator hit.
+
+    Finds the mediator names in the whole text in one pass and locates
+    each hit's line around it, so per-line analysis only runs on
+    lines that can produce a violation and no list of all lines is built.
+    """
+    hit_starts = _mediator_hit_starts(content)
+
+    candidates = []
+    line_num, prev = 1, 0
+    for pos in sorted(hit_starts):
+        # Hits are visited in order, so newlines are counted once overall
+        line_num += content.count('\n', prev, pos)
+        prev = pos
+        if candidates and candidates[-1][0] == line_num:
+            continue
+        start = content.rfind('\n', 0, pos) + 1
+        end = content.find('\n', pos)
+        candidates.append((line_num, start, end if end != -1 else len(content)))
+    return candidates
+
+
+def _mask_comments_and_docstrings(source: str) -> str:
+    """
+    ``source`` with comments and docstrings blanked out.
+
+    Docstrings here are string literals forming a whole statement. Other
+    strings are kept, as column lists name mediators in string literals.
+    The result has the same length and newlines as ``source``, so offsets
+    and line numbers carry over; ``source`` is returned unchanged if it
+    does not tokenize.
+    """
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(source).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return source
+
+    line_starts = [0]
+    line_starts.extend(m.end() for m in re.finditer('\n', source))
+
+    spans = []
+    statement_start = True
+    for i, tok in enumerate(tokens):
+        if tok.type == tokenize.COMMENT:
+            spans.append((tok.start, tok.end))
+        elif tok.type == tokenize.STRING and statement_start:
+            following = next(
+                (t.type for t in tokens[i + 1:] if t.type not in (tokenize.COMMENT, tokenize.NL)),
+                tokenize.ENDMARKER
+            )
+            if following in (tokenize.NEWLINE, tokenize.ENDMARKER):
+                spans.append((tok.start, tok.end))
+
+        if tok.type not in (tokenize.COMMENT, tokenize.NL):
+            statement_start = tok.type in (tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT)
+
+    pieces = []
+    prev = 0
+    for (start_row, start_col), (end_row, end_col) in spans:
+        start = line_starts[start_row - 1] + start_col
+        end = line_starts[end_row - 1] + end_col
+        pieces.append(source[prev:start])
+        pieces.append(_NON_NEWLINE.sub(' ', source[start:end]))
+        prev = end
+    pieces.append(source[prev:])
+    return ''.join(pieces)
+
+
+def _mediators_in(node: ast.AST) -> Set[str]:
+    """Mediator names and string literals in ``node`` or its (nested) list/tuple elements."""
+    found = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Name):
+            if node.id in MEDIATORS:
+                found.add(node.id)
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, str) and node.value in MEDIATORS:
+                found.add(node.value)
+        elif isinstance(node, (ast.List, ast.Tuple)):
+            stack.extend(node.elts)
+    return found
+
+
+@dataclass(slots=True, kw_only=True)
+class Violation:
+    """A potential mediator leak; fields that do not apply to its type stay None."""
+    file: str
+    line: int
+    type: str
+    severity: str
+    mediator: Optional[str] = None
+    variable: Optional[str] = None
+    mediators: Optional[List[str]] = None
+    pattern: Optional[str] = None
+    code: Optional[str] = None
+    context: str
+    cell: Optional[int] = None
+
+    def to_dict(self) -> Dict:
+        """The fields that apply, as a JSON-ready dict."""
+        values = ((f.name, getattr(self, f.name)) for f in fields(self))
+        return {name: value for name, value in values if value is not None}
+
+
+
+def _json_default(obj):
+    """json.dump fallback: violations as dicts, anything else as its str()."""
+    if isinstance(obj, Violation):
+        return obj.to_dict()
+    return str(obj)
+
 class MediatorLeakageScanner:
     """Scan codebase for mediator leakage in total effect models."""
 
@@ -66,8 +349,10 @@ class MediatorLeakageScanner:
             'info': [],
             'leakage_detected': False
         }
+        # (context, severity) per line text: repeated lines classify once
+        self._line_classes: Dict[str, Tuple[str, str]] = {}
 
-    def scan_file(self, filepath: Path) -> List[Dict]:
+    def scan_file(self, filepath: Path) -> List[Violation]:
         """Scan a single file for mediator references."""
         violations = []
 
@@ -78,9 +363,9 @@ class MediatorLeakageScanner:
         self.results['files_scanned'].append(str(filepath))
 
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-                lines = content.split('\n')
+            content = _read_source(filepath)
+            if content is None:
+                return violations
 
             # Parse AST for more accurate detection
             try:
@@ -89,9 +374,16 @@ class MediatorLeakageScanner:
             except SyntaxError:
                 print(f"  Warning: Could not parse AST for {filepath.name}")
 
-            # Line-by-line analysis
-            for line_num, line in enumerate(lines, 1):
-                line_violations = self._analyze_line(line, line_num, filepath)
+            # Line analysis, restricted to lines with a mediator hit in
+            # code (tokenizing only files that have any hit at all)
+            code = content
+            candidates = _candidate_lines(content)
+            if candidates:
+                code = _mask_comments_and_docstrings(content)
+                candidates = _candidate_lines(code)
+
+            for line_num, start, end in candidates:
+                line_violations = self._analyze_line(content[start:end], line_num, filepath, code[start:end])
                 violations.extend(line_violations)
 
         except Exception as e:
@@ -99,152 +391,133 @@ class MediatorLeakageScanner:
 
         return violations
 
-    def _analyze_ast(self, tree: ast.AST, filepath: Path) -> List[Dict]:
+    def _analyze_ast(self, tree: ast.AST, filepath: Path) -> List[Violation]:
         """Analyze AST for mediator usage in dangerous contexts."""
         violations = []
 
-        class MediatorVisitor(ast.NodeVisitor):
-            def __init__(self, scanner, filepath):
-                self.scanner = scanner
-                self.filepath = filepath
-                self.violations = []
-
-            def visit_Call(self, node):
-                """Check function calls for regression/model fitting."""
-                if hasattr(node.func, 'attr'):
-                    # Check for model fitting methods
-                    if node.func.attr in ['fit', 'predict', 'transform']:
-                        # Check arguments for mediators
-                        for arg in node.args:
-                            if isinstance(arg, ast.Name) and arg.id in MEDIATORS:
-                                self.violations.append({
-                                    'file': self.filepath.name,
-                                    'line': node.lineno,
-                                    'type': 'AST_MODEL_FIT',
-                                    'severity': 'CRITICAL',
-                                    'mediator': arg.id,
-                                    'context': f"{node.func.attr} call"
-                                })
-
-                self.generic_visit(node)
-
-            def visit_Assign(self, node):
-                """Check variable assignments."""
+        # One flat walk with isinstance checks (no NodeVisitor dispatch)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call):
+                # Check for model fitting methods
+                method = getattr(node.func, 'attr', None)
+                if method in _MODEL_METHODS:
+                    # Check arguments for mediators
+                    for arg in node.args:
+                        if isinstance(arg, ast.Name) and arg.id in MEDIATORS:
+                            violations.append(Violation(
+                                file=filepath.name,
+                                line=node.lineno,
+                                type='AST_MODEL_FIT',
+                                severity='CRITICAL',
+                                mediator=arg.id,
+                                context=f"{method} call"
+                            ))
+
+            elif isinstance(node, ast.Assign):
                 # Check if assigning to X_vars, predictors, etc.
                 for target in node.targets:
                     if isinstance(target, ast.Name):
                         if any(context in target.id.lower() for context in ['x_vars', 'predictors', 'features']):
                             # Check if mediators in the value
-                            mediators_found = self._find_mediators_in_node(node.value)
+                            mediators_found = _mediators_in(node.value)
                             if mediators_found:
-                                self.violations.append({
-                                    'file': self.filepath.name,
-                                    'line': node.lineno,
-                                    'type': 'AST_ASSIGNMENT',
-                                    'severity': 'CRITICAL',
-                                    'variable': target.id,
-                                    'mediators': list(mediators_found),
-                                    'context': f"Assignment to {target.id}"
-                                })
-
-                self.generic_visit(node)
-
-            def _find_mediators_in_node(self, node):
-                """Recursively find mediator references in a node."""
-                mediators_found = set()
-
-                if isinstance(node, ast.Name) and node.id in MEDIATORS:
-                    mediators_found.add(node.id)
-                elif isinstance(node, ast.Str) and node.s in MEDIATORS:
-                    mediators_found.add(node.s)
-                elif isinstance(node, ast.List):
-                    for elt in node.elts:
-                        mediators_found.update(self._find_mediators_in_node(elt))
-                elif isinstance(node, ast.Tuple):
-                    for elt in node.elts:
-                        mediators_found.update(self._find_mediators_in_node(elt))
-
-                return mediators_found
-
-        visitor = MediatorVisitor(self, filepath)
-        visitor.visit(tree)
-        violations.extend(visitor.violations)
-
+                                violations.append(Violation(
+                                    file=filepath.name,
+                                    line=node.lineno,
+                                    type='AST_ASSIGNMENT',
+                                    severity='CRITICAL',
+                                    variable=target.id,
+                                    mediators=sorted(mediators_found),
+                                    context=f"Assignment to {target.id}"
+                                ))
+
+        # ast.walk is breadth-first; report in source order
+        violations.sort(key=lambda v: v.line)
         return violations
 
-    def _analyze_line(self, line: str, line_num: int, filepath: Path) -> List[Dict]:
-        """Analyze a single line for mediator references."""
+    def _analyze_line(self, line: str, line_num: int, filepath: Path, code: Optional[str] = None) -> List[Violation]:
+        """
+        Analyze a single line for mediator references.
+
+        Mediators are searched in ``code`` (the line with comments and
+        docstrings blanked, defaults to ``line``) while the context is
+        judged on the whole line.
+        """
         violations = []
+        if code is None:
+            code = line
 
         # Skip comments and docstrings
         stripped = line.strip()
         if stripped.startswith('#') or stripped.startswith('"""') or stripped.startswith("'''"):
             return violations
 
-        # Check for mediator mentions
-        line_lower = line.lower()
-
-        # Direct mediator check
-        for mediator in MEDIATORS:
-            if mediator.lower() in line_lower:
-                # Determine context
-                context = self._determine_context(line)
-                severity = self._determine_severity(line, context)
-
-                if severity in ['CRITICAL', 'HIGH']:
-                    violation = {
-                        'file': filepath.name,
-                        'line': line_num,
-                        'type': 'LINE_SCAN',
-                        'severity': severity,
-                        'mediator': mediator,
-                        'code': line.strip()[:100],  # First 100 chars
-                        'context': context
-                    }
-                    violations.append(violation)
+        # Cheap sweep first; lines without hits are never classified
+        mediators_found, patterns_found = _line_hits(code)
+        if not mediators_found and not patterns_found:
+            return violations
+
+        context, severity = self._classify(line)
+        if severity not in ['CRITICAL', 'HIGH']:
+            return violations
+
+        # Direct mediator check (case-insensitive substring match)
+        for mediator in sorted(mediators_found):
+            violation = Violation(
+                file=filepath.name,
+                line=line_num,
+                type='LINE_SCAN',
+                severity=severity,
+                mediator=mediator,
+                code=line.strip()[:100],  # First 100 chars
+                context=context
+            )
+            violations.append(violation)
 
         # Pattern-based check
-        for pattern in MEDIATOR_PATTERNS:
-            if re.search(pattern, line, re.IGNORECASE):
-                context = self._determine_context(line)
-                severity = self._determine_severity(line, context)
-
-                if severity in ['CRITICAL', 'HIGH']:
-                    violation = {
-                        'file': filepath.name,
-                        'line': line_num,
-                        'type': 'PATTERN_MATCH',
-                        'severity': severity,
-                        'pattern': pattern,
-                        'code': line.strip()[:100],
-                        'context': context
-                    }
-                    violations.append(violation)
+        for pattern in patterns_found:
+            violation = Violation(
+                file=filepath.name,
+                line=line_num,
+                type='PATTERN_MATCH',
+                severity=severity,
+                pattern=pattern,
+                code=line.strip()[:100],
+                context=context
+            )
+            violations.append(violation)
 
         return violations
 
+    def _classify(self, line: str) -> Tuple[str, str]:
+        """(context, severity) of a line, memoized on its text across the scan."""
+        classified = self._line_classes.get(line)
+        if classified is None:
+            context = self._determine_context(line)
+            classified = (context, self._determine_severity(line, context))
+            self._line_classes[line] = classified
+        return classified
+
     def _determine_context(self, line: str) -> str:
         """Determine the context of mediator usage."""
-        line_lower = line.lower()
-
         # Check for safe contexts first
-        for safe in SAFE_CONTEXTS:
-            if safe in line_lower:
-                return f"SAFE: {safe}"
+        safe = _first_context(_SAFE_RE, SAFE_CONTEXTS, line)
+        if safe is not None:
+            return f"SAFE: {safe}"
 
         # Check for forbidden contexts
-        for forbidden in FORBIDDEN_CONTEXTS:
-            if forbidden in line_lower:
-                return f"FORBIDDEN: {forbidden}"
+        forbidden = _first_context(_FORBIDDEN_RE, FORBIDDEN_CONTEXTS, line)
+        if forbidden is not None:
+            return f"FORBIDDEN: {forbidden}"
 
         # Check for specific patterns
         if 'df[' in line or 'df[[' in line:
             return "DataFrame indexing"
         elif '=' in line and any(var in line for var in ['X', 'features', 'predictors']):
             return "Variable assignment"
-        elif '.corr(' in line or 'correlation' in line_lower:
+        elif '.corr(' in line or 'correlation' in line.lower():
             return "Correlation analysis"
-        elif '.fit(' in line or 'regression' in line_lower:
+        elif '.fit(' in line or 'regression' in line.lower():
             return "Model fitting"
 
         return "Unknown"
@@ -258,22 +531,11 @@ class MediatorLeakageScanner:
             return "CRITICAL"
 
         # Specific high-risk patterns
-        high_risk_patterns = [
-            r'X_vars.*=',
-            r'predictors.*=',
-            r'\.fit\(',
-            r'LinearRegression',
-            r'OLS\(',
-            r'panel.*model',
-            r'correlation.*matrix'
-        ]
-
-        for pattern in high_risk_patterns:
-            if re.search(pattern, line, re.IGNORECASE):
-                return "CRITICAL"
+        if _HIGH_RISK_RE.search(line):
+            return "CRITICAL"
 
         # Medium risk
-        if any(term in line.lower() for term in ['model', 'regression', 'analysis']):
+        if _MEDIUM_RISK_RE.search(line):
             return "HIGH"
 
         return "LOW"
@@ -282,7 +544,7 @@ class MediatorLeakageScanner:
         """Recursively scan directory for Python files."""
         print(f"\nScanning directory: {directory}")
 
-        py_files = list(directory.rglob("*.py"))
+        py_files = list(_iter_files(directory, ".py"))
         print(f"Found {len(py_files)} Python files")
 
         for py_file in py_files:
@@ -293,10 +555,10 @@ class MediatorLeakageScanner:
             violations = self.scan_file(py_file)
 
             for violation in violations:
-                if violation['severity'] == 'CRITICAL':
+                if violation.severity == 'CRITICAL':
                     self.results['violations'].append(violation)
                     self.results['leakage_detected'] = True
-                elif violation['severity'] == 'HIGH':
+                elif violation.severity == 'HIGH':
                     self.results['warnings'].append(violation)
                 else:
                     self.results['info'].append(violation)
@@ -305,26 +567,25 @@ class MediatorLeakageScanner:
         """Scan Jupyter notebooks for mediator leakage."""
         print(f"\nScanning notebooks in: {directory}")
 
-        notebooks = list(directory.rglob("*.ipynb"))
+        notebooks = list(_iter_files(directory, ".ipynb"))
         print(f"Found {len(notebooks)} notebooks")
 
         for notebook_path in notebooks:
             try:
-                with open(notebook_path, 'r') as f:
-                    nb_content = json.load(f)
+                with open(notebook_path, 'rb') as f:
+                    nb_content = _load_json(f.read())
 
                 for cell_idx, cell in enumerate(nb_content.get('cells', [])):
                     if cell.get('cell_type') == 'code':
                         source = ''.join(cell.get('source', []))
 
                         # Create temporary analysis
-                        lines = source.split('\n')
-                        for line_num, line in enumerate(lines, 1):
-                            violations = self._analyze_line(line, line_num, notebook_path)
+                        for line_num, start, end in _candidate_lines(source):
+                            violations = self._analyze_line(source[start:end], line_num, notebook_path)
 
                             for violation in violations:
-                                violation['cell'] = cell_idx
-                                if violation['severity'] == 'CRITICAL':
+                                violation.cell = cell_idx
+                                if violation.severity == 'CRITICAL':
                                     self.results['violations'].append(violation)
                                     self.results['leakage_detected'] = True
 
@@ -356,10 +617,10 @@ class MediatorLeakageScanner:
             report.append("CRITICAL VIOLATIONS (Must Fix)")
             report.append("-" * 40)
             for v in self.results['violations'][:20]:  # Show first 20
-                report.append(f"File: {v['file']}, Line: {v['line']}")
-                report.append(f"  Mediator: {v.get('mediator', v.get('pattern', 'unknown'))}")
-                report.append(f"  Context: {v['context']}")
-                report.append(f"  Code: {v.get('code', 'N/A')}")
+                report.append(f"File: {v.file}, Line: {v.line}")
+                report.append(f"  Mediator: {v.mediator or v.pattern or 'unknown'}")
+                report.append(f"  Context: {v.context}")
+                report.append(f"  Code: {v.code if v.code is not None else 'N/A'}")
                 report.append("")
 
         # Warnings
@@ -367,8 +628,8 @@ class MediatorLeakageScanner:
             report.append("WARNINGS (Review Needed)")
             report.append("-" * 40)
             for w in self.results['warnings'][:10]:  # Show first 10
-                report.append(f"File: {w['file']}, Line: {w['line']}")
-                report.append(f"  Context: {w['context']}")
+                report.append(f"File: {w.file}, Line: {w.line}")
+                report.append(f"  Context: {w.context}")
                 report.append("")
 
         # Recommendation
@@ -389,15 +650,17 @@ class MediatorLeakageScanner:
     def save_results(self, output_dir: Path) -> None:
         """Save scan results to files."""
         output_dir.mkdir(exist_ok=True, parents=True)
+        # One timestamp so the JSON and text report always pair up
+        ts = datetime.now().strftime('%Y%m%d_%H%M%S')
 
         # Save JSON results
-        json_path = output_dir / f"mediator_scan_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        json_path = output_dir / f"mediator_scan_{ts}.json"
         with open(json_path, 'w') as f:
-            json.dump(self.results, f, indent=2, default=str)
+            json.dump(self.results, f, indent=2, default=_json_default)
 
         # Save text report
         report = self.generate_report()
-        report_path = output_dir / f"mediator_scan_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        report_path = output_dir / f"mediator_scan_report_{ts}.txt"
         with open(report_path, 'w') as f:
             f.write(report)
 
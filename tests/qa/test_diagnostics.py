@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.regression.linear_model import OLS
+from statsmodels.stats.outliers_influence import OLSInfluence, variance_inflation_factor
+from statsmodels.tools import add_constant
+from statsmodels.tsa.stattools import adfuller, pacf_ols
+
+from src.qa.diagnostics import (
+    _batch_simple_df_test,
+    compute_dfbetas,
+    compute_leverage,
+    compute_pacf,
+    compute_vif,
+    detect_outliers_iqr,
+)
+
+
+@pytest.fixture
+def design():
+    rng = np.random.default_rng(0)
+    n = 200
+    x1 = rng.normal(5.0, 2.0, n)
+    x2 = 0.7 * x1 + rng.normal(0.0, 1.0, n)
+    x3 = rng.uniform(-10.0, 10.0, n)
+    x4 = 0.3 * x2 - 0.5 * x3 + rng.normal(0.0, 0.5, n)
+    return pd.DataFrame({"x1": x1, "x2": x2, "x3": x3, "x4": x4})
+
+
+def test_compute_vif_matches_statsmodels_with_constant(design):
+    exog = add_constant(design.to_numpy())
+    expected = [variance_inflation_factor(exog, i) for i in range(1, exog.shape[1])]
+
+    vif = compute_vif(design)
+
+    assert list(vif.index) == list(design.columns)
+    np.testing.assert_allclose(vif.to_numpy(), expected, rtol=1e-10)
+
+
+def test_compute_vif_ignores_constant_column(design):
+    with_const = design.assign(const=1.0)
+    pd.testing.assert_series_equal(compute_vif(with_const), compute_vif(design))
+
+
+def test_compute_vif_exact_collinearity_is_infinite(design):
+    collinear = design.assign(x5=design["x1"] - 2 * design["x3"])
+    vif = compute_vif(collinear)
+    assert np.isinf(vif[["x1", "x3", "x5"]]).all()
+    assert np.isfinite(vif[["x2", "x4"]]).all()
+
+
+def test_compute_dfbetas_matches_statsmodels():
+    rng = np.random.default_rng(1)
+    n = 80
+    X = add_constant(rng.normal(size=(n, 3)))
+    y = X @ np.array([1.0, 0.5, -2.0, 0.3]) + rng.standard_t(3, n)
+    # One high-leverage, high-residual observation
+    X[0, 1:] = [6.0, -5.0, 4.0]
+    y[0] += 10.0
+    results = OLS(y, X).fit()
+
+    dfbetas = compute_dfbetas(X, results.resid, results.cov_params())
+
+    np.testing.assert_allclose(dfbetas, OLSInfluence(results).dfbetas, rtol=1e-10)
+    np.testing.assert_array_equal(
+        compute_dfbetas(X, results.resid, results.cov_params(), order="F"), dfbetas
+    )
+
+
+@pytest.mark.parametrize("shape", [(40, 4), (3, 5)])
+def test_compute_leverage_matches_pseudo_inverse_hat_matrix(shape):
+    X = np.random.default_rng(3).normal(size=shape)
+    hat = X @ np.linalg.pinv(X.T @ X) @ X.T
+
+    np.testing.assert_allclose(compute_leverage(X), np.diag(hat), atol=1e-12)
+
+
+@pytest.mark.parametrize("n, nlags, n_estimated", [(500, 40, 40), (50, 40, 24), (9, 40, 4)])
+def test_compute_pacf_ols_matches_statsmodels(n, nlags, n_estimated):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.normal(size=n)) * 0.1 + rng.normal(size=n)
+
+    pacf = compute_pacf(x, nlags=nlags, method="ols")
+
+    assert pacf.shape == (nlags + 1,)
+    np.testing.assert_allclose(
+        pacf[:n_estimated + 1], pacf_ols(x, nlags=n_estimated, efficient=False), rtol=1e-10
+    )
+    assert np.isnan(pacf[n_estimated + 1:]).all()
+
+
+@pytest.mark.filterwarnings("ignore:adfuller currently returns:FutureWarning")
+@pytest.mark.parametrize("regression, sm_regression", [("c", "c"), ("ct", "ct"), ("nc", "n")])
+def test_simple_df_test_matches_adfuller_without_lags(regression, sm_regression):
+    rng = np.random.default_rng(2)
+    walks = np.cumsum(rng.normal(size=(150, 3)), axis=0)
+    walks[:, 2] = 0.6 * walks[:, 0] + rng.normal(size=150)
+
+    results = _batch_simple_df_test(walks, regression)
+
+    expected = [adfuller(walks[:, j], maxlag=0, autolag=None, regression=sm_regression)[0]
+                for j in range(walks.shape[1])]
+    np.testing.assert_allclose([r["test_statistic"] for r in results], expected, rtol=1e-10)
+    assert all(r["n_obs"] == 149 for r in results)
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 8, 101])
+def test_detect_outliers_iqr_quartiles_match_percentile(n):
+    rng = np.random.default_rng(n)
+    x = rng.standard_t(2, n)
+
+    result = detect_outliers_iqr(x)
+
+    np.testing.assert_allclose([result["q1"], result["q3"]], np.percentile(x, [25, 75]), rtol=1e-12)
+    q1, q3 = np.percentile(x, [25, 75])
+    expected = np.where((x < q1 - 1.5 * (q3 - q1)) | (x > q3 + 1.5 * (q3 - q1)))[0]
+    assert result["outlier_indices"] == expected.tolist()
+
+
+def test_detect_outliers_iqr_nan_input_matches_percentile():
+    x = np.array([1, 2, 3, np.nan, 100, 4, 5, 6])
+
+    result = detect_outliers_iqr(x)
+
+    assert np.isnan(result["q1"]) and np.isnan(result["q3"]) and np.isnan(result["iqr"])
+    assert result["n_outliers"] == 0
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from statsmodels.tsa.stattools import adfuller
+
+# phase5_qa_checks imports its plotting stack at module level
+pytest.importorskip("matplotlib")
+pytest.importorskip("seaborn")
+
+from src.qa.phase5_qa_checks import _adf_aic  # noqa: E402
+
+
+def _random_walk(n, seed):
+    return np.cumsum(np.random.default_rng(seed).normal(size=n))
+
+
+def _ar1(n, phi, seed):
+    shocks = np.random.default_rng(seed).normal(size=n)
+    x = np.empty(n)
+    x[0] = shocks[0]
+    for t in range(1, n):
+        x[t] = phi * x[t - 1] + shocks[t]
+    return x
+
+
+def _tied(n, seed):
+    # Heavily rounded random walk: long runs of identical values
+    return np.round(_random_walk(n, seed) / 3)
+
+
+SERIES = {
+    "random_walk_60": _random_walk(60, 0),
+    "random_walk_1000": _random_walk(1000, 1),
+    "ar1_0.5_250": _ar1(250, 0.5, 2),
+    "ar1_0.95_500": _ar1(500, 0.95, 3),
+    "tied_300": _tied(300, 4),
+}
+
+
+@pytest.mark.filterwarnings("ignore:adfuller currently returns:FutureWarning")
+@pytest.mark.parametrize("name", SERIES)
+def test_adf_aic_matches_adfuller(name):
+    x = SERIES[name]
+    stat, pvalue, used_lag, n_obs, crit, best_aic = _adf_aic(x)
+    ref_stat, ref_pvalue, ref_lag, ref_nobs, ref_crit, ref_aic = adfuller(x, autolag="AIC")
+
+    assert used_lag == ref_lag
+    assert n_obs == ref_nobs
+    np.testing.assert_allclose([stat, pvalue, best_aic], [ref_stat, ref_pvalue, ref_aic], rtol=1e-8)
+    assert crit.keys() == ref_crit.keys()
+    np.testing.assert_allclose([crit[k] for k in ref_crit], list(ref_crit.values()), rtol=1e-12)